@@ -1,11 +1,21 @@
 # api/routes/candidates.py
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
+import mimetypes
+from urllib.parse import quote
 from backend.database.config import get_db
 from backend.models.database import *
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from backend.services.candidate_cleanup import candidate_cleanup
+from backend.services.s3_service import s3_service
+from backend.services.rescoring_service import rescore_candidates_task
+from backend.services.resume_processor import sync_semantic_index_task
+from backend.services.semantic_search import semantic_search
+from backend.services.fulltext_search import fulltext_search
 
 router = APIRouter()
 
@@ -19,6 +29,7 @@ class CandidateResponse(BaseModel):
     experience_level: str
     status: str
     created_at: datetime
+    highlights: Optional[List[str]] = None
     
     class Config:
         from_attributes = True
@@ -32,6 +43,15 @@ class CandidateDetailResponse(CandidateResponse):
     projects: List[dict]
     certifications: List[dict]
 
+class BulkDeleteRequest(BaseModel):
+    # An empty list would otherwise drop the filter and match every candidate
+    candidate_ids: Optional[List[int]] = Field(None, min_length=1)
+    status: Optional[str] = None
+    experience_level: Optional[str] = None
+    classification: Optional[str] = None
+    max_score: Optional[float] = None
+    created_before: Optional[datetime] = None
+
 @router.get("/", response_model=List[CandidateResponse])
 async def get_candidates(
     skip: int = Query(0, ge=0),
@@ -40,11 +60,27 @@ async def get_candidates(
     status: Optional[str] = Query(None),
     experience_level: Optional[str] = Query(None),
     min_score: Optional[float] = Query(None, ge=0, le=100),
+    mode: str = Query("keyword", pattern="^(keyword|semantic)$"),
+    q: Optional[str] = Query(None, description='Resume text search: AND by default, OR, NOT/-term, "phrase", prefix*'),
     db: Session = Depends(get_db)
 ):
     query = db.query(Candidate)
     
-    if search:
+    parsed = None
+    if q:
+        parsed = fulltext_search.parse(q)
+        if parsed is None:
+            raise HTTPException(status_code=400, detail="Query must contain at least one search term")
+        query = fulltext_search.apply(db, query, parsed)
+    
+    ranking = None
+    if search and mode == "semantic":
+        # Over-fetch so the filters below still leave a full page
+        ranking = {candidate_id: rank for rank, (candidate_id, _) in enumerate(
+            await run_in_threadpool(semantic_search.search, search, k=(skip + limit) * 4)
+        )}
+        query = query.filter(Candidate.id.in_(list(ranking)))
+    elif search:
         query = query.filter(
             Candidate.full_name.contains(search) |
             Candidate.email.contains(search) |
@@ -60,7 +96,15 @@ async def get_candidates(
     if min_score is not None:
         query = query.filter(Candidate.overall_score >= min_score)
     
-    candidates = query.offset(skip).limit(limit).all()
+    if ranking is not None:
+        candidates = sorted(query.all(), key=lambda c: ranking[c.id])[skip:skip + limit]
+    else:
+        candidates = query.offset(skip).limit(limit).all()
+    
+    if parsed is not None:
+        highlights = fulltext_search.highlights_for(db, [c.id for c in candidates], parsed)
+        for candidate in candidates:
+            candidate.highlights = highlights.get(candidate.id, [])
     return candidates
 
 @router.get("/{candidate_id}", response_model=CandidateDetailResponse)
@@ -138,6 +182,29 @@ async def get_candidate(candidate_id: int, db: Session = Depends(get_db)):
         } for cert in candidate.certifications]
     }
 
+@router.get("/{candidate_id}/resume")
+async def download_resume(candidate_id: int, db: Session = Depends(get_db)):
+    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    
+    if not candidate or not candidate.s3_file_key:
+        raise HTTPException(status_code=404, detail="Resume file not found")
+    
+    filename = candidate.original_filename or candidate.s3_file_key.rsplit('/', 1)[-1]
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    # RFC 5987 form so non-ASCII (e.g. Vietnamese) filenames survive the latin-1 header encoding
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"}
+    
+    # Served from the disk cache with sendfile: repeat downloads only cost a conditional GET
+    path = await run_in_threadpool(s3_service.cached_path, candidate.s3_file_key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    
+    # Cache disabled or unwritable: stream straight from S3 rather than buffering the file
+    chunks = await run_in_threadpool(s3_service.stream_file, candidate.s3_file_key)
+    if chunks is None:
+        raise HTTPException(status_code=404, detail="Resume file not found in storage")
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
 @router.put("/{candidate_id}/status")
 async def update_candidate_status(
     candidate_id: int,
@@ -170,4 +237,53 @@ async def delete_candidate(candidate_id: int, db: Session = Depends(get_db)):
     
     db.delete(candidate)
     db.commit()
-    return {"message": "Candidate deleted successfully"}
\ No newline at end of file
+    return {"message": "Candidate deleted successfully"}
+
+@router.post("/bulk-delete")
+async def bulk_delete_candidates(request: BulkDeleteRequest, db: Session = Depends(get_db)):
+    criteria = {key: value for key, value in request.dict().items() if value is not None}
+    if not criteria:
+        raise HTTPException(status_code=400, detail="At least one filter or candidate ID is required")
+    if 'created_before' in criteria:
+        criteria['created_before'] = criteria['created_before'].isoformat()
+    
+    try:
+        job = candidate_cleanup.create_job(db, criteria)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid status or experience level value")
+    
+    candidate_cleanup.enqueue_job(job.job_id)
+    return {
+        "job_id": job.job_id,
+        "total_candidates": job.total_candidates,
+        "status": job.status
+    }
+
+@router.get("/bulk-delete/{job_id}")
+async def get_bulk_delete_status(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "total_candidates": job.total_candidates,
+        "deleted_candidates": job.deleted_candidates,
+        "deleted_files": job.deleted_files,
+        "failed_files": job.failed_files,
+        "error_message": job.error_message,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
+
+@router.post("/rescore")
+async def rescore_candidates():
+    rescore_candidates_task.delay()
+    return {"message": "Rescoring started"}
+
+@router.post("/semantic-index/sync")
+async def sync_semantic_index():
+    sync_semantic_index_task.delay()
+    return {"message": "Semantic index sync started"}
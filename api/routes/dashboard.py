@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from backend.database.config import get_db
 from backend.models.database import *
+from backend.services.match_score_store import match_score_store
+from backend.services.s3_disk_cache import s3_disk_cache
 
 router = APIRouter()
 
@@ -49,7 +51,16 @@ async def get_job_requirements_for_dashboard(db: Session = Depends(get_db)):
     return [{"id": jr.id, "job_title": jr.job_title} for jr in job_reqs]
 
 @router.get("/match-results/{job_id}")
-async def get_match_results(job_id: int, db: Session = Depends(get_db)):
-    from api.routes.jobs import match_candidates  
-    return await match_candidates(job_id, db)
+async def get_match_results(job_id: int, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    job = db.query(JobRequirement).filter(JobRequirement.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    if job.scores_computed_at is None:
+        # Jobs created before scores were materialized are scored on first view
+        match_score_store.refresh_job(db, job)
+        db.commit()
+    return match_score_store.top_matches(db, job, limit)
 
+@router.get("/cache-stats")
+async def get_cache_stats():
+    return {"s3": s3_disk_cache.stats()}
@@ -0,0 +1,65 @@
+# api/routes/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional, Any
+from backend.database.config import get_db
+from backend.models.database import *
+from backend.services.matching_service import matching_service
+from backend.services.match_score_store import match_score_store
+from pydantic import BaseModel
+
+router = APIRouter()
+
+class JobRequirementCreate(BaseModel):
+    job_title: str
+    required_skills: List[str] = []
+    preferred_skills: List[str] = []
+    min_experience_years: int = 0
+    education_requirements: Optional[Any] = None
+
+@router.get("/")
+async def get_jobs(db: Session = Depends(get_db)):
+    jobs = db.query(JobRequirement).order_by(JobRequirement.created_at.desc()).all()
+    return [{
+        "id": job.id,
+        "job_title": job.job_title,
+        "required_skills": job.required_skills,
+        "preferred_skills": job.preferred_skills,
+        "min_experience_years": job.min_experience_years,
+        "education_requirements": job.education_requirements
+    } for job in jobs]
+
+@router.post("/")
+async def create_job(request: JobRequirementCreate, db: Session = Depends(get_db)):
+    job = JobRequirement(**request.dict())
+    db.add(job)
+    db.flush()
+    match_score_store.refresh_job(db, job)
+    db.commit()
+    return {"id": job.id, "message": "Job requirement created successfully"}
+
+@router.put("/{job_id}")
+async def update_job(job_id: int, request: JobRequirementCreate, db: Session = Depends(get_db)):
+    job = db.query(JobRequirement).filter(JobRequirement.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    
+    for field, value in request.dict().items():
+        setattr(job, field, value)
+    # Only this job's scores depend on its requirements
+    match_score_store.refresh_job(db, job)
+    db.commit()
+    return {"message": "Job requirement updated successfully"}
+
+@router.get("/{job_id}/matches")
+async def get_job_matches(job_id: int, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    return await match_candidates(job_id, db, limit)
+
+async def match_candidates(job_id: int, db: Session, limit: int = 20):
+    job = db.query(JobRequirement).filter(JobRequirement.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job requirement not found")
+    
+    return matching_service.match(db, job, limit)
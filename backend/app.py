@@ -21,7 +21,8 @@ def get_db():
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
     try:
-        batch_id = await resume_processor.process_batch([file])
+        batch_id = resume_processor.create_batch([(file.filename, await file.read())])
+        resume_processor.enqueue_batch(batch_id)
         return {"batch_id": batch_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi xử lý file: {str(e)}")
@@ -1,5 +1,5 @@
 # models/database.py
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Enum, Boolean, Date, DateTime, JSON, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, Enum, Boolean, Date, DateTime, JSON, ForeignKey, TIMESTAMP, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -78,6 +78,7 @@ class Candidate(Base):
     projects = relationship("Project", back_populates="candidate", cascade="all, delete-orphan")
     certifications = relationship("Certification", back_populates="candidate", cascade="all, delete-orphan")
     extracted_text = relationship("ExtractedText", back_populates="candidate", cascade="all, delete-orphan")
+    job_scores = relationship("CandidateJobScore", cascade="all, delete-orphan")
 
 class Education(Base):
     __tablename__ = "education"
@@ -173,6 +174,9 @@ class ProcessingBatch(Base):
     successful_files = Column(Integer, default=0)
     failed_files = Column(Integer, default=0)
     status = Column(Enum(BatchStatus), default=BatchStatus.PENDING, index=True)
+    # Set by the run currently processing the batch, which refreshes heartbeat_at while it is alive
+    run_id = Column(String(36))
+    heartbeat_at = Column(TIMESTAMP)
     started_at = Column(TIMESTAMP)
     completed_at = Column(TIMESTAMP)
     created_at = Column(TIMESTAMP, server_default=func.now())
@@ -180,6 +184,22 @@ class ProcessingBatch(Base):
     # Relationships
     processing_logs = relationship("ProcessingLog", back_populates="batch")
 
+class DeletionJob(Base):
+    __tablename__ = "deletion_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), unique=True, nullable=False, index=True)
+    criteria = Column(JSON)
+    status = Column(Enum(BatchStatus), default=BatchStatus.PENDING, index=True)
+    total_candidates = Column(Integer, default=0)
+    deleted_candidates = Column(Integer, default=0)
+    deleted_files = Column(Integer, default=0)
+    failed_files = Column(Integer, default=0)
+    error_message = Column(Text)
+    started_at = Column(TIMESTAMP)
+    completed_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
 class ProcessingLog(Base):
     __tablename__ = "processing_logs"
     
@@ -188,12 +208,14 @@ class ProcessingLog(Base):
     candidate_id = Column(Integer, ForeignKey("candidates.id"), index=True)
     filename = Column(String(255), nullable=False, index=True)
     file_size = Column(Integer)
+    file_hash = Column(String(64), index=True)
     s3_key = Column(String(500))
     processing_status = Column(Enum(ProcessingStatus), default=ProcessingStatus.PENDING, index=True)
     extraction_confidence = Column(DECIMAL(3,2))
     error_message = Column(Text)
     processing_time_seconds = Column(DECIMAL(10,3))
     llm_response_time = Column(DECIMAL(10,3))
+    meta_data = Column(JSON)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.current_timestamp())
     
@@ -203,6 +225,9 @@ class ProcessingLog(Base):
 
 class ExtractedText(Base):
     __tablename__ = "extracted_text"
+    __table_args__ = (
+        Index('ft_extracted_raw_text', 'raw_text', mysql_prefix='FULLTEXT'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False, index=True)
@@ -227,4 +252,22 @@ class JobRequirement(Base):
     preferred_skills = Column(JSON)
     min_experience_years = Column(Integer, default=0)
     education_requirements = Column(JSON)
-    created_at = Column(TIMESTAMP, server_default=func.now())
\ No newline at end of file
+    scores_computed_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+class CandidateJobScore(Base):
+    __tablename__ = "candidate_job_scores"
+    __table_args__ = (
+        UniqueConstraint('job_id', 'candidate_id', name='uq_job_candidate'),
+        # Serves ORDER BY match_score DESC LIMIT k for one job straight from the index
+        Index('idx_job_match_score', 'job_id', 'match_score'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("job_requirements.id"), nullable=False)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False, index=True)
+    match_score = Column(DECIMAL(5,2), nullable=False)
+    matched_required_skills = Column(JSON)
+    missing_required_skills = Column(JSON)
+    matched_preferred_skills = Column(JSON)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.current_timestamp())
@@ -0,0 +1,144 @@
+import os
+import uuid
+import logging
+from typing import List, Dict, Any
+from datetime import datetime
+from sqlalchemy.orm import Session, Query
+from backend.services.s3_service import s3_service
+from backend.services.semantic_search import semantic_search
+from backend.services.resume_processor import celery_app
+from backend.models.database import *
+from backend.database.config import SessionLocal
+from dotenv import load_dotenv
+load_dotenv()
+
+# Rows keyed by candidate_id that have to go before the candidate itself
+CHILD_MODELS = [Education, Experience, Skill, Project, Certification, ExtractedText, CandidateJobScore]
+
+class CandidateCleanupService:
+    def __init__(self, chunk_size: int = 500, s3_batch_size: int = 1000):
+        self.logger = logging.getLogger(__name__)
+        self.chunk_size = max(1, chunk_size)
+        self.s3_batch_size = min(max(1, s3_batch_size), 1000)
+
+    def build_query(self, db: Session, criteria: Dict[str, Any]) -> Query:
+        query = db.query(Candidate.id, Candidate.s3_file_key)
+
+        if criteria.get('candidate_ids') is not None:
+            query = query.filter(Candidate.id.in_(criteria['candidate_ids']))
+        if criteria.get('status') is not None:
+            query = query.filter(Candidate.status == CandidateStatus(criteria['status'].upper()))
+        if criteria.get('experience_level') is not None:
+            query = query.filter(Candidate.experience_level == ExperienceLevel(criteria['experience_level'].upper()))
+        if criteria.get('classification') is not None:
+            query = query.filter(Candidate.classification == criteria['classification'])
+        if criteria.get('max_score') is not None:
+            query = query.filter(Candidate.overall_score <= criteria['max_score'])
+        if criteria.get('created_before') is not None:
+            query = query.filter(Candidate.created_at < criteria['created_before'])
+
+        return query
+
+    def create_job(self, db: Session, criteria: Dict[str, Any]) -> DeletionJob:
+        total = self.build_query(db, criteria).count()
+        job = DeletionJob(
+            job_id=str(uuid.uuid4()),
+            criteria=criteria,
+            status=BatchStatus.PENDING,
+            total_candidates=total
+        )
+        db.add(job)
+        db.commit()
+        return job
+
+    def enqueue_job(self, job_id: str):
+        delete_candidates_task.delay(job_id)
+
+    def run_job(self, job_id: str):
+        db = SessionLocal()
+        try:
+            job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+            job.status = BatchStatus.PROCESSING
+            job.started_at = datetime.now()
+            db.commit()
+            criteria = job.criteria or {}
+
+            pending_keys: List[str] = []
+            last_id = 0
+            while True:
+                # Keyset pagination: rows already deleted never have to be skipped over again
+                rows = self.build_query(db, criteria).filter(
+                    Candidate.id > last_id
+                ).order_by(Candidate.id).limit(self.chunk_size).all()
+                if not rows:
+                    break
+
+                candidate_ids = [row.id for row in rows]
+                last_id = candidate_ids[-1]
+                self._delete_chunk(db, candidate_ids)
+                db.query(DeletionJob).filter(DeletionJob.job_id == job_id).update({
+                    DeletionJob.deleted_candidates: DeletionJob.deleted_candidates + len(candidate_ids)
+                }, synchronize_session=False)
+                db.commit()
+                self._remove_embeddings(candidate_ids)
+
+                # Objects go only after their rows are committed, so a failed chunk never leaves dangling keys
+                pending_keys.extend(row.s3_file_key for row in rows if row.s3_file_key)
+                if len(pending_keys) >= self.s3_batch_size:
+                    self._delete_files(db, job_id, pending_keys)
+                    pending_keys = []
+
+            if pending_keys:
+                self._delete_files(db, job_id, pending_keys)
+
+            job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+            job.status = BatchStatus.COMPLETED
+            job.completed_at = datetime.now()
+            db.commit()
+
+        except Exception as e:
+            self.logger.error(f"Deletion job {job_id} failed: {str(e)}")
+            db.rollback()
+            job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+            job.status = BatchStatus.FAILED
+            job.error_message = str(e)
+            job.completed_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+
+    def _delete_chunk(self, db: Session, candidate_ids: List[int]):
+        for model in CHILD_MODELS:
+            db.query(model).filter(model.candidate_id.in_(candidate_ids)).delete(synchronize_session=False)
+        # Processing history is kept for auditing, only the link to the candidate is dropped
+        db.query(ProcessingLog).filter(ProcessingLog.candidate_id.in_(candidate_ids)).update(
+            {ProcessingLog.candidate_id: None}, synchronize_session=False
+        )
+        db.query(Candidate).filter(Candidate.id.in_(candidate_ids)).delete(synchronize_session=False)
+
+    def _remove_embeddings(self, candidate_ids: List[int]):
+        try:
+            semantic_search.remove(candidate_ids)
+        except Exception as e:
+            self.logger.error(f"Failed to remove {len(candidate_ids)} candidate(s) from the semantic index: {str(e)}")
+
+    def _delete_files(self, db: Session, job_id: str, s3_keys: List[str]):
+        result = s3_service.delete_files(s3_keys)
+        for error in result['errors']:
+            self.logger.error(f"Failed to delete {error['s3_key']} from S3: {error['error']}")
+        db.query(DeletionJob).filter(DeletionJob.job_id == job_id).update({
+            DeletionJob.deleted_files: DeletionJob.deleted_files + result['deleted'],
+            DeletionJob.failed_files: DeletionJob.failed_files + len(result['errors'])
+        }, synchronize_session=False)
+        db.commit()
+
+CANDIDATE_CLEANUP_CONFIG = {
+    'chunk_size': int(os.getenv('DELETE_CHUNK_SIZE', 500)),
+    's3_batch_size': int(os.getenv('S3_DELETE_BATCH_SIZE', 1000))
+}
+
+candidate_cleanup = CandidateCleanupService(**CANDIDATE_CLEANUP_CONFIG)
+
+@celery_app.task(name='candidate_cleanup.delete_candidates')
+def delete_candidates_task(job_id: str):
+    candidate_cleanup.run_job(job_id)
@@ -1,43 +1,70 @@
 # services/classification_service.py
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional
 from sqlalchemy.orm import Session
-from backend.models.database import Candidate, Experience, Education, Skill, ExperienceLevel, SkillCategory, ProficiencyLevel, EducationLevel
-from datetime import datetime, date
+from backend.models.database import Candidate, ExperienceLevel, SkillCategory, ProficiencyLevel, EducationLevel
+from datetime import date
 import logging
 
+SENIOR_TITLE_WORDS = ['senior', 'lead', 'principal', 'architect']
+MID_TITLE_WORDS = ['mid', 'intermediate', 'ii', '2']
+LEAD_TITLE_WORDS = ['manager', 'director', 'head', 'chief']
+
+EDUCATION_LEVEL_POINTS = {
+    EducationLevel.PHD: 5,
+    EducationLevel.MASTER: 4,
+    EducationLevel.BACHELOR: 3,
+    EducationLevel.ASSOCIATE: 2
+}
+
+PROFICIENCY_POINTS = {
+    ProficiencyLevel.EXPERT: 1.0,
+    ProficiencyLevel.ADVANCED: 0.8,
+    ProficiencyLevel.INTERMEDIATE: 0.5
+}
+
+SCORE_WEIGHTS = {
+    'experience': 0.5,
+    'education': 0.2,
+    'skills': 0.3
+}
+
+def _field(item: Any, name: str) -> Any:
+    # Rows arrive either as ORM objects or as the insert dicts built by ResumeProcessor
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
 class ClassificationService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-    
+
     def classify_candidate(self, candidate: Candidate, db: Session) -> Dict[str, Any]:
         db.flush()
+        return self.score(candidate.experience, candidate.education, candidate.skills)
 
-        # Calculate experience score
-        experience_score = self._calculate_experience_score(candidate, db)
+    def score(self, experiences: Iterable[Any], educations: Iterable[Any], skills: Iterable[Any],
+              today: date = None) -> Dict[str, Any]:
+        """Score a candidate from already-loaded rows without touching the database."""
+        experience = self._summarize_experience(experiences, today or date.today())
+        experience_score = self._experience_score(experience)
+        education_score = self._education_score(educations)
+        skills_score = self._skills_score(skills)
 
-        # Calculate education score
-        education_score = self._calculate_education_score(candidate, db)
-
-        # Calculate skills score
-        skills_score = self._calculate_skills_score(candidate, db)
-
-        # Calculate overall score
-        weights = {
-            'experience': 0.5,
-            'education': 0.2,
-            'skills': 0.3
-        }
-        
         overall_score = (
-            experience_score * weights['experience'] +
-            education_score * weights['education'] +
-            skills_score * weights['skills']
+            experience_score * SCORE_WEIGHTS['experience'] +
+            education_score * SCORE_WEIGHTS['education'] +
+            skills_score * SCORE_WEIGHTS['skills']
         )
-        
-        experience_level = self._determine_experience_level(candidate, db)
-        
-        classification = self._generate_classification(candidate, db, overall_score)
-        
+
+        experience_level = self._experience_level(experience)
+        classification = f"{experience_level.value} {experience['latest_title'] or 'Professional'}"
+
         return {
             'overall_score': round(overall_score, 2),
             'experience_level': experience_level,
@@ -48,133 +75,94 @@ class ClassificationService:
                 'skills_score': round(skills_score, 2)
             }
         }
-    
-    def _calculate_experience_score(self, candidate: Candidate, db: Session) -> float:
-        experiences = db.query(Experience).filter(Experience.candidate_id == candidate.id).all()
-        if not experiences:
-            return 0.0
-        
+
+    def _summarize_experience(self, experiences: Iterable[Any], today: date) -> Dict[str, Any]:
+        count = 0
         total_months = 0
         role_quality_score = 0
-        
+        has_senior_role = False
+        has_lead_role = False
+        latest_title = None
+        latest_start = None
+
         for exp in experiences:
-            start_date = exp.start_date
-            end_date = exp.end_date or date.today()
-            
+            count += 1
+            start_date = _field(exp, 'start_date')
+            end_date = _field(exp, 'end_date') or today
+            raw_title = _field(exp, 'job_title')
+
             if start_date:
                 months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
                 total_months += max(0, months)
-            
-            job_title = (exp.job_title or '').lower()
-            if any(word in job_title for word in ['senior', 'lead', 'principal', 'architect']):
+
+            if count == 1 or (start_date and (latest_start is None or start_date > latest_start)):
+                latest_title = raw_title
+                latest_start = start_date
+
+            job_title = (raw_title or '').lower()
+            if any(word in job_title for word in SENIOR_TITLE_WORDS):
                 role_quality_score += 3
-            elif any(word in job_title for word in ['mid', 'intermediate', 'ii', '2']):
+                has_senior_role = True
+            elif any(word in job_title for word in MID_TITLE_WORDS):
                 role_quality_score += 2
             else:
                 role_quality_score += 1
-        
-        total_years = total_months / 12
-        
-        years_score = min(total_years / 10, 1.0) * 7  
-        quality_score = min(role_quality_score / len(experiences) / 3, 1.0) * 3  
-        print(f"quality score {quality_score}")
-        return years_score + quality_score
-    
-    def _calculate_education_score(self, candidate: Candidate, db: Session) -> float:
-        
-        educations = db.query(Education).filter(Education.candidate_id == candidate.id).all()
-        
-        if not educations:
+            if any(word in job_title for word in LEAD_TITLE_WORDS):
+                has_lead_role = True
+
+        return {
+            'count': count,
+            'total_years': total_months / 12,
+            'role_quality_score': role_quality_score,
+            'has_senior_role': has_senior_role,
+            'has_lead_role': has_lead_role,
+            'latest_title': latest_title
+        }
+
+    def _experience_score(self, experience: Dict[str, Any]) -> float:
+        if not experience['count']:
             return 0.0
-        
+
+        years_score = min(experience['total_years'] / 10, 1.0) * 7
+        quality_score = min(experience['role_quality_score'] / experience['count'] / 3, 1.0) * 3
+        return years_score + quality_score
+
+    def _education_score(self, educations: Iterable[Any]) -> float:
         max_score = 0
-        
+
         for edu in educations:
-            score = 0
-            
-            if edu.education_level == EducationLevel.PHD:
-                score += 5
-            elif edu.education_level == EducationLevel.MASTER:
-                score += 4
-            elif edu.education_level == EducationLevel.BACHELOR:
-                score += 3
-            elif edu.education_level == EducationLevel.ASSOCIATE:
-                score += 2
-            else:
-                score += 1
-            
-            if edu.gpa and edu.gpa >= 3.5:
+            score = EDUCATION_LEVEL_POINTS.get(_field(edu, 'education_level'), 1)
+
+            gpa = _to_float(_field(edu, 'gpa'))
+            if gpa and gpa >= 3.5:
                 score += 1
-            elif edu.gpa and edu.gpa >= 3.0:
+            elif gpa and gpa >= 3.0:
                 score += 0.5
-            
+
             max_score = max(max_score, score)
-        
+
         return min(max_score, 10.0)
-    
-    def _calculate_skills_score(self, candidate: Candidate, db: Session) -> float:
-        skills = db.query(Skill).filter(Skill.candidate_id == candidate.id).all()
-        
-        if not skills:
-            return 0.0
-        
-        technical_skills = [s for s in skills if s.skill_category == SkillCategory.TECHNICAL]
-        
+
+    def _skills_score(self, skills: Iterable[Any]) -> float:
         skill_score = 0
-        
-        for skill in technical_skills:
-            if skill.proficiency_level == ProficiencyLevel.EXPERT:
-                skill_score += 1.0
-            elif skill.proficiency_level == ProficiencyLevel.ADVANCED:
-                skill_score += 0.8
-            elif skill.proficiency_level == ProficiencyLevel.INTERMEDIATE:
-                skill_score += 0.5
-            else:
-                skill_score += 0.2
-        
-        normalized_score = min(skill_score / 2, 10.0)
-        
-        return normalized_score
-    
-    def _determine_experience_level(self, candidate: Candidate, db: Session) -> ExperienceLevel:
-        experiences = db.query(Experience).filter(Experience.candidate_id == candidate.id).all()
-        
-        if not experiences:
+
+        for skill in skills:
+            if _field(skill, 'skill_category') != SkillCategory.TECHNICAL:
+                continue
+            skill_score += PROFICIENCY_POINTS.get(_field(skill, 'proficiency_level'), 0.2)
+
+        return min(skill_score / 2, 10.0)
+
+    def _experience_level(self, experience: Dict[str, Any]) -> ExperienceLevel:
+        if not experience['count']:
             return ExperienceLevel.ENTRY
-        
-        total_months = 0
-        has_senior_role = False
-        has_lead_role = False
-        
-        for exp in experiences:
-            start_date = exp.start_date
-            end_date = exp.end_date or date.today()
-            
-            if start_date:
-                months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-                total_months += max(0, months)
-            
-            job_title = (exp.job_title or '').lower()
-            if any(word in job_title for word in ['senior', 'lead', 'principal', 'architect']):
-                has_senior_role = True
-            if any(word in job_title for word in ['manager', 'director', 'head', 'chief']):
-                has_lead_role = True
-        
-        total_years = total_months / 12
-        
-        if has_lead_role and total_years >= 5:
+
+        total_years = experience['total_years']
+        if experience['has_lead_role'] and total_years >= 5:
             return ExperienceLevel.LEAD
-        elif has_senior_role or total_years >= 5:
+        elif experience['has_senior_role'] or total_years >= 5:
             return ExperienceLevel.SENIOR
         elif total_years >= 2:
             return ExperienceLevel.MID
         else:
             return ExperienceLevel.ENTRY
-        
-    def _generate_classification(self, candidate: Candidate, db: Session, overall_score: float) -> str:
-        latest_experience = db.query(Experience).filter(Experience.candidate_id == candidate.id)\
-                            .order_by(Experience.start_date.desc()).first()
-        
-        job_title = latest_experience.job_title if latest_experience else "Professional"
-        
-        return f"{candidate.experience_level.value} {job_title}"
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+class ExtractionCache:
+    def __init__(self, path: str = "cache/extraction_cache.db", max_entries: int = 10000, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON extraction_cache (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def make_key(self, resume_text: str, model: str, prompt_version: str) -> str:
+        # Whitespace and case differences between extractions of the same CV should not miss
+        normalized = " ".join(resume_text.split()).lower()
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, normalized):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT data, confidence FROM extraction_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE extraction_cache SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key)
+                )
+                conn.commit()
+                self.hits += 1
+                return {'data': json.loads(row[0]), 'confidence': row[1]}
+        except Exception as e:
+            self.logger.warning(f"Extraction cache read failed: {str(e)}")
+            return None
+
+    def set(self, cache_key: str, data: Dict[str, Any], confidence: float):
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (cache_key, data, confidence, last_access) VALUES (?, ?, ?, ?)",
+                    (cache_key, json.dumps(data), confidence, time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+        except Exception as e:
+            self.logger.warning(f"Extraction cache write failed: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        count = conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute("""
+                DELETE FROM extraction_cache WHERE cache_key IN (
+                    SELECT cache_key FROM extraction_cache ORDER BY last_access ASC LIMIT ?
+                )
+            """, (overflow,))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+EXTRACTION_CACHE_CONFIG = {
+    'path': os.getenv('EXTRACTION_CACHE_PATH', 'cache/extraction_cache.db'),
+    'max_entries': int(os.getenv('EXTRACTION_CACHE_MAX_ENTRIES', 10000)),
+    'enabled': os.getenv('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+}
+
+extraction_cache = ExtractionCache(**EXTRACTION_CACHE_CONFIG)
@@ -1,6 +1,10 @@
 import os
-import tempfile
-from typing import Dict, Any, Optional
+import io
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Iterator, Tuple
 import PyPDF2
 import pdfplumber
 from docx import Document
@@ -8,27 +12,215 @@ import boto3
 from PIL import Image
 import pytesseract
 import logging
+from backend.services.pdf_backends import PdfBackend, PdfBackendRegistry, PdfProfile
+from backend.services.extraction_cache import ExtractionCache
+
+OCR_LANG = 'eng+vie'
+# Bump when _preprocess_for_ocr changes so cached page text is not reused
+OCR_PREPROCESS_VERSION = "1"
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    # Celery's multiprocessing fork; unlike the stdlib it lets daemonic processes start children
+    import billiard
+except ImportError:
+    billiard = None
+
+def _init_extraction_worker(max_memory_mb: int):
+    if max_memory_mb and resource is not None:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _extract_in_worker(file_content: bytes, filename: str, s3_key: str, local_ocr: bool) -> Dict[str, Any]:
+    return file_processor._extract_text(file_content, filename, s3_key, local_ocr)
+
+def _extraction_worker_main(conn, max_memory_mb: int):
+    _init_extraction_worker(max_memory_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        try:
+            result = _extract_in_worker(*task)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        conn.send(result)
+
+class ExtractionTimeout(Exception):
+    pass
+
+class _ExtractionWorker:
+    """One extraction process owned by a single task at a time, so a hung task can be killed alone."""
+
+    def __init__(self, context, max_memory_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_extraction_worker_main, args=(child_conn, max_memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def run(self, task: Tuple, timeout: float) -> Dict[str, Any]:
+        self.conn.send(task)
+        if not self.conn.poll(timeout):
+            raise ExtractionTimeout()
+        # EOFError here means the process died mid-task (e.g. the memory limit)
+        result = self.conn.recv()
+        self.tasks += 1
+        return result
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            # billiard processes have no kill(); terminate() is SIGTERM, which parsers do not handle
+            getattr(self.process, 'kill', self.process.terminate)()
+        self.process.join()
+        self.conn.close()
 
 class FileProcessor:
-    def __init__(self):
+    def __init__(self, workers: int = 0, task_timeout: float = 60.0, max_tasks_per_worker: int = 50,
+                 max_worker_memory_mb: int = 1024, max_pages: int = 20,
+                 complex_layout_fonts: int = 12, ocr_workers: int = 4, ocr_resolution: int = 200,
+                 ocr_max_dimension: int = 2500, ocr_threshold: int = 180,
+                 textract_mode: str = 'sync', ocr_cache: Optional[ExtractionCache] = None):
         self.logger = logging.getLogger(__name__)
         self.textract_client = boto3.client(
             'textract',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'ap-southeast-1')
+            region_name=os.getenv('AWS_REGION', 'ap-southeast-1'),
+            endpoint_url=os.getenv('TEXTRACT_ENDPOINT_URL') or None
         )
+        self.textract_mode = textract_mode
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_worker_memory_mb = max_worker_memory_mb
+        # Caps OCR only: rendering and recognizing pages is the one cost that grows without bound.
+        # Text layers are always read in full so stored text is never cut short.
+        self.max_pages = max_pages
+        self.complex_layout_fonts = complex_layout_fonts
+        self.pdf_backends = PdfBackendRegistry()
+        self.pdf_backends.register(PdfBackend(
+            name='pypdf2',
+            extract=self._extract_pdf_with_pypdf2,
+            # Many fonts usually means multi-column or designed templates, where PyPDF2 scrambles reading order
+            can_handle=lambda profile: profile.has_text_layer and profile.font_count < self.complex_layout_fonts,
+            seconds_per_page=0.02
+        ))
+        self.pdf_backends.register(PdfBackend(
+            name='pdfplumber',
+            extract=self._extract_pdf_with_pdfplumber,
+            can_handle=lambda profile: profile.has_text_layer,
+            seconds_per_page=0.1
+        ))
+        self.pdf_backends.register(PdfBackend(
+            name='ocr',
+            extract=self._extract_pdf_with_ocr,
+            can_handle=lambda profile: not profile.has_text_layer,
+            seconds_per_page=2.0
+        ))
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_resolution = ocr_resolution
+        self.ocr_max_dimension = ocr_max_dimension
+        self.ocr_threshold = ocr_threshold
+        self.ocr_cache = ocr_cache
+        self._ocr_executor = None
+        self._pool_lock = threading.Lock()
+        self._idle_workers = []
+        self._worker_slots = threading.BoundedSemaphore(max(1, workers))
+    
+    def _worker_context(self):
+        # spawn avoids forking a parent that is already running threads (boto3, asyncio executors).
+        # Celery prefork children are daemonic and the stdlib refuses to let them start children,
+        # so inside a worker the extraction processes are started through billiard instead.
+        if multiprocessing.current_process().daemon:
+            return billiard.get_context('spawn') if billiard is not None else None
+        return multiprocessing.get_context('spawn')
+    
+    def _use_workers(self) -> bool:
+        return self.workers > 0 and self._worker_context() is not None
     
-    def extract_text_from_file(self, file_content: bytes, filename: str, s3_key: str) -> Dict[str, Any]:
+    def _checkout_worker(self) -> _ExtractionWorker:
+        with self._pool_lock:
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        return _ExtractionWorker(self._worker_context(), self.max_worker_memory_mb)
+    
+    def _checkin_worker(self, worker: _ExtractionWorker):
+        if worker.tasks >= self.max_tasks_per_worker:
+            # Recycle long-lived workers so leaked parser memory is returned
+            worker.stop()
+            return
+        with self._pool_lock:
+            self._idle_workers.append(worker)
+    
+    def shutdown(self):
+        with self._pool_lock:
+            workers, self._idle_workers = self._idle_workers, []
+            ocr_executor, self._ocr_executor = self._ocr_executor, None
+        for worker in workers:
+            worker.stop()
+        if ocr_executor is not None:
+            ocr_executor.shutdown(wait=False)
+    
+    def extract_text_from_file(self, file_content: bytes, filename: str, s3_key: str,
+                               local_ocr: bool = False) -> Dict[str, Any]:
+        if not self._use_workers():
+            return self._extract_text(file_content, filename, s3_key, local_ocr)
+        
+        with self._worker_slots:
+            worker = None
+            try:
+                worker = self._checkout_worker()
+                result = worker.run((file_content, filename, s3_key, local_ocr), self.task_timeout)
+            except ExtractionTimeout:
+                self.logger.error(f"Text extraction timed out for {filename} after {self.task_timeout}s")
+                # Only this task's process is killed; other files keep extracting
+                worker.kill()
+                return {
+                    'success': False,
+                    'error': f'Text extraction timed out after {self.task_timeout}s'
+                }
+            except Exception as e:
+                self.logger.error(f"Extraction worker failed for {filename}: {str(e)}")
+                if worker is not None:
+                    worker.kill()
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+            self._checkin_worker(worker)
+            return result
+    
+    def needs_s3_object(self, filename: str) -> bool:
+        # Only synchronous Textract on images reads the upload; everything else can extract while it is in flight
+        file_extension = os.path.splitext(filename)[1].lower()
+        return self.textract_mode == 'sync' and file_extension in ['.jpg', '.jpeg', '.png', '.tiff']
+    
+    def _extract_text(self, file_content: bytes, filename: str, s3_key: str, local_ocr: bool = False) -> Dict[str, Any]:
+        # In async Textract mode OCR is left to the caller, which batches Textract jobs across files
+        defer_ocr = self.textract_mode == 'async' and not local_ocr
         file_extension = os.path.splitext(filename)[1].lower()
         
         try:
             if file_extension == '.pdf':
-                return self._extract_from_pdf(file_content)
+                return self._extract_from_pdf(file_content, defer_ocr)
             elif file_extension == '.docx':
                 return self._extract_from_docx(file_content)
             elif file_extension in ['.jpg', '.jpeg', '.png', '.tiff']:
-                return self._extract_from_image(file_content, s3_key)
+                return self._extract_from_image(file_content, s3_key, defer_ocr)
             else:
                 return {
                     'success': False,
@@ -42,39 +234,105 @@ class FileProcessor:
                 'error': str(e)
             }
     
-    def _extract_from_pdf(self, file_content: bytes) -> Dict[str, Any]:
-        text = ""
-        page_count = 0
+    def _iter_pdfplumber_pages(self, pdf) -> Iterator[str]:
+        for page in pdf.pages:
+            try:
+                yield page.extract_text() or ""
+            finally:
+                # Drop the page's parsed layout objects before moving on
+                page.flush_cache()
+    
+    def _iter_pypdf2_pages(self, pdf_reader) -> Iterator[str]:
+        for index in range(len(pdf_reader.pages)):
+            yield pdf_reader.pages[index].extract_text() or ""
+    
+    def _collect_pages(self, pages: Iterator[str], page_count: int) -> Tuple[str, int, bool]:
+        parts = []
+        pages_extracted = 0
+        
+        for page_text in pages:
+            pages_extracted += 1
+            if page_text:
+                parts.append(page_text)
+        
+        return "\n".join(parts), pages_extracted, pages_extracted < page_count
+    
+    def _extract_pdf_with_pdfplumber(self, buffer: io.BytesIO, profile: PdfProfile) -> Tuple[str, int, int, bool]:
+        with pdfplumber.open(buffer) as pdf:
+            page_count = len(pdf.pages)
+            text, pages_extracted, truncated = self._collect_pages(self._iter_pdfplumber_pages(pdf), page_count)
+        return text, page_count, pages_extracted, truncated
+    
+    def _extract_pdf_with_pypdf2(self, buffer: io.BytesIO, profile: PdfProfile) -> Tuple[str, int, int, bool]:
+        # The profiling pass already parsed the document with PyPDF2
+        pdf_reader = profile.reader or PyPDF2.PdfReader(buffer)
+        page_count = len(pdf_reader.pages)
+        text, pages_extracted, truncated = self._collect_pages(self._iter_pypdf2_pages(pdf_reader), page_count)
+        return text, page_count, pages_extracted, truncated
+    
+    def _get_ocr_executor(self) -> ThreadPoolExecutor:
+        # Threads are enough: pytesseract runs each page in its own tesseract process
+        with self._pool_lock:
+            if self._ocr_executor is None:
+                self._ocr_executor = ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix='ocr')
+            return self._ocr_executor
+    
+    def _preprocess_for_ocr(self, image: Image.Image) -> Image.Image:
+        image = image.convert('L')
+        largest_side = max(image.size)
+        if largest_side > self.ocr_max_dimension:
+            scale = self.ocr_max_dimension / largest_side
+            image = image.resize((int(image.width * scale), int(image.height * scale)), Image.LANCZOS)
+        threshold = self.ocr_threshold
+        return image.point(lambda value: 255 if value > threshold else 0)
+    
+    def _ocr_page(self, image: Image.Image) -> str:
+        image = self._preprocess_for_ocr(image)
+        
+        cache_key = None
+        if self.ocr_cache:
+            digest = hashlib.sha256(image.tobytes())
+            digest.update(f"{image.size}|{OCR_LANG}|{OCR_PREPROCESS_VERSION}".encode('utf-8'))
+            cache_key = digest.hexdigest()
+            cached = self.ocr_cache.get(cache_key)
+            if cached:
+                return cached['data']['text']
+        
+        text = pytesseract.image_to_string(image, lang=OCR_LANG)
+        if cache_key:
+            self.ocr_cache.set(cache_key, {'text': text}, 1.0)
+        return text
+    
+    def _extract_pdf_with_ocr(self, buffer: io.BytesIO, profile: PdfProfile) -> Tuple[str, int, int, bool]:
+        with pdfplumber.open(buffer) as pdf:
+            page_count = len(pdf.pages)
+            images = []
+            for page in pdf.pages[:self.max_pages]:
+                images.append(page.to_image(resolution=self.ocr_resolution).original)
+                page.flush_cache()
         
+        page_texts = self._get_ocr_executor().map(self._ocr_page, images)
+        text, pages_extracted, truncated = self._collect_pages(page_texts, page_count)
+        return text, page_count, pages_extracted, truncated
+    
+    def _extract_from_pdf(self, file_content: bytes, defer_ocr: bool = False) -> Dict[str, Any]:
         try:
-            with tempfile.NamedTemporaryFile() as temp_file:
-                temp_file.write(file_content)
-                temp_file.flush()
-                
-                with pdfplumber.open(temp_file.name) as pdf:
-                    page_count = len(pdf.pages)
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-            
-            if not text.strip():
-                with tempfile.NamedTemporaryFile() as temp_file:
-                    temp_file.write(file_content)
-                    temp_file.flush()
-                    
-                    with open(temp_file.name, 'rb') as pdf_file:
-                        pdf_reader = PyPDF2.PdfReader(pdf_file)
-                        page_count = len(pdf_reader.pages)
-                        for page in pdf_reader.pages:
-                            text += page.extract_text() + "\n"
+            # Every backend reads the same in-memory buffer; nothing touches disk
+            result = self.pdf_backends.extract(io.BytesIO(file_content), exclude=('ocr',) if defer_ocr else ())
+            text, page_count, pages_extracted, truncated = result['output']
             
             return {
                 'success': True,
                 'text': text.strip(),
                 'page_count': page_count,
-                'extraction_method': 'PDF',
-                'word_count': len(text.split())
+                'pages_extracted': pages_extracted,
+                'truncated': truncated,
+                'extraction_method': 'OCR' if result['backend'] == 'ocr' else 'PDF',
+                'word_count': len(text.split()),
+                'extraction_backend': result['backend'],
+                'backend_attempts': result['attempts'],
+                'pdf_profile': result['profile'],
+                'needs_ocr': defer_ocr and not text.strip()
             }
             
         except Exception as e:
@@ -85,29 +343,26 @@ class FileProcessor:
     
     def _extract_from_docx(self, file_content: bytes) -> Dict[str, Any]:
         try:
-            with tempfile.NamedTemporaryFile() as temp_file:
-                temp_file.write(file_content)
-                temp_file.flush()
-                
-                doc = Document(temp_file.name)
-                text = ""
-                
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\n"
-                
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            text += cell.text + "\t"
-                        text += "\n"
-                
-                return {
-                    'success': True,
-                    'text': text.strip(),
-                    'page_count': 1,
-                    'extraction_method': 'DOCX',
-                    'word_count': len(text.split())
-                }
+            doc = Document(io.BytesIO(file_content))
+            parts = []
+            
+            for paragraph in doc.paragraphs:
+                parts.append(paragraph.text + "\n")
+            
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        parts.append(cell.text + "\t")
+                    parts.append("\n")
+            
+            text = "".join(parts)
+            return {
+                'success': True,
+                'text': text.strip(),
+                'page_count': 1,
+                'extraction_method': 'DOCX',
+                'word_count': len(text.split())
+            }
                 
         except Exception as e:
             return {
@@ -115,8 +370,22 @@ class FileProcessor:
                 'error': f'DOCX extraction failed: {str(e)}'
             }
     
-    def _extract_from_image(self, file_content: bytes, s3_key: str) -> Dict[str, Any]:
+    def _extract_from_image(self, file_content: bytes, s3_key: str, defer_ocr: bool = False) -> Dict[str, Any]:
+        if defer_ocr:
+            return {
+                'success': True,
+                'text': '',
+                'page_count': 1,
+                'extraction_method': 'OCR',
+                'word_count': 0,
+                'needs_ocr': True
+            }
+        
         try:
+            # Only the sync mode calls Textract here; async mode has already tried it by the time OCR runs locally
+            if self.textract_mode != 'sync':
+                return self._extract_with_tesseract(file_content)
+            
             # Try AWS Textract first
             textract_result = self._extract_with_textract(s3_key)
             if textract_result['success']:
@@ -162,21 +431,17 @@ class FileProcessor:
     
     def _extract_with_tesseract(self, file_content: bytes) -> Dict[str, Any]:
         try:
-            with tempfile.NamedTemporaryFile() as temp_file:
-                temp_file.write(file_content)
-                temp_file.flush()
-                
-                image = Image.open(temp_file.name)
-                text = pytesseract.image_to_string(image, lang='eng+vie')
-                
-                return {
-                    'success': True,
-                    'text': text.strip(),
-                    'page_count': 1,
-                    'extraction_method': 'Tesseract_OCR',
-                    'word_count': len(text.split())
-                }
-                
+            with Image.open(io.BytesIO(file_content)) as image:
+                text = self._ocr_page(image)
+            
+            return {
+                'success': True,
+                'text': text.strip(),
+                'page_count': 1,
+                'extraction_method': 'Tesseract_OCR',
+                'word_count': len(text.split())
+            }
+            
         except Exception as e:
             self.logger.error(f"Tesseract failed: {str(e)}")
             return {
@@ -184,5 +449,25 @@ class FileProcessor:
                 'error': f'Tesseract extraction failed: {str(e)}'
             }
 
+FILE_PROCESSOR_CONFIG = {
+    'workers': int(os.getenv('EXTRACTION_WORKERS', os.cpu_count() or 1)),
+    'task_timeout': float(os.getenv('EXTRACTION_TIMEOUT', 60)),
+    'max_tasks_per_worker': int(os.getenv('EXTRACTION_MAX_TASKS_PER_WORKER', 50)),
+    'max_worker_memory_mb': int(os.getenv('EXTRACTION_WORKER_MEMORY_MB', 1024)),
+    'max_pages': int(os.getenv('EXTRACTION_MAX_PAGES', 20)),
+    'complex_layout_fonts': int(os.getenv('PDF_COMPLEX_LAYOUT_FONTS', 12)),
+    'ocr_workers': int(os.getenv('OCR_WORKERS', os.cpu_count() or 1)),
+    'ocr_resolution': int(os.getenv('OCR_RESOLUTION', 200)),
+    'ocr_max_dimension': int(os.getenv('OCR_MAX_DIMENSION', 2500)),
+    'ocr_threshold': int(os.getenv('OCR_THRESHOLD', 180)),
+    'textract_mode': os.getenv('TEXTRACT_MODE', 'sync').lower()
+}
+
+ocr_cache = ExtractionCache(
+    path=os.getenv('OCR_CACHE_PATH', 'cache/ocr_cache.db'),
+    max_entries=int(os.getenv('OCR_CACHE_MAX_ENTRIES', 50000)),
+    enabled=os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+)
+
 # Singleton instance
-file_processor = FileProcessor()
\ No newline at end of file
+file_processor = FileProcessor(**FILE_PROCESSOR_CONFIG, ocr_cache=ocr_cache)
\ No newline at end of file
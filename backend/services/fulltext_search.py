@@ -0,0 +1,210 @@
+import os
+import re
+import html
+import logging
+from typing import List, Optional, Tuple
+from dataclasses import dataclass, field
+from sqlalchemy import func, exists
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session, Query
+from backend.models.database import Candidate, ExtractedText
+
+TOKEN_PATTERN = re.compile(r'-?"[^"]*"|\S+')
+# Characters MySQL boolean mode treats as operators inside a term
+OPERATOR_CHARS = re.compile(r'[+\-<>()~"@*]')
+# Symbols that are part of a skill name but split words for the FULLTEXT parser (C++, C#, F#)
+SYMBOL_CHARS = re.compile(r'[+#]')
+
+@dataclass
+class ParsedQuery:
+    # None when every term has to be matched by regexp instead
+    boolean_query: Optional[str]
+    highlight_terms: List[str] = field(default_factory=list)
+    # Each entry is one AND-ed group of alternatives, as a single regexp over raw_text
+    regexp_groups: List[str] = field(default_factory=list)
+    regexp_excluded: List[str] = field(default_factory=list)
+
+class FullTextSearch:
+    """Keyword search over ExtractedText.raw_text backed by a MySQL FULLTEXT index.
+
+    Query syntax: terms are ANDed, "OR" between terms makes them alternatives, a leading "-" or "NOT"
+    excludes, "double quotes" match a phrase and a trailing * matches a prefix.
+
+    InnoDB does not index words shorter than innodb_ft_min_token_size (3 by default) and splits words
+    on + and #, so terms like "Go", "R", "C++" or "C#" can never match the index. Those terms, and any
+    OR group containing one, are matched with REGEXP on raw_text instead, which scans every row and
+    is noticeably slower. Set FULLTEXT_MIN_TOKEN_SIZE if the server uses a different token size.
+    """
+
+    def __init__(self, snippet_window: int = 80, max_snippets: int = 3, min_token_size: int = 3):
+        self.snippet_window = snippet_window
+        self.max_snippets = max_snippets
+        self.min_token_size = min_token_size
+        self.logger = logging.getLogger(__name__)
+
+    def _clean(self, token: str) -> Optional[str]:
+        phrase = token.startswith('"')
+        prefix = token.endswith('*') and not phrase
+        term = OPERATOR_CHARS.sub(' ', token).strip()
+        term = re.sub(r'\s+', ' ', term)
+        if not term:
+            return None
+        if phrase:
+            return f'"{term}"'
+        if ' ' in term:
+            # Punctuation split the word apart, so keep its pieces together as a phrase
+            return f'"{term}"'
+        return f"{term}*" if prefix else term
+
+    def _is_short(self, raw: str, term: str) -> bool:
+        if term.startswith('"'):
+            return False
+        if SYMBOL_CHARS.search(raw.rstrip('*')):
+            return True
+        words = re.findall(r'\w+', term)
+        return max((len(word) for word in words), default=0) < self.min_token_size
+
+    def _term_regexp(self, raw: str, term: str, short: bool) -> str:
+        if short:
+            # The raw token keeps the symbols FULLTEXT would have dropped
+            core = re.escape(raw.strip('"').rstrip('*'))
+            if raw.endswith('*'):
+                core += r'\w*'
+        elif term.endswith('*'):
+            core = re.escape(term[:-1]) + r'\w*'
+        else:
+            core = r'\s+'.join(re.escape(word) for word in term.strip('"').split())
+        return rf'(?<![\w+#]){core}(?![\w+#])'
+
+    def parse(self, q: str) -> Optional[ParsedQuery]:
+        groups: List[List[Tuple[str, str, bool]]] = []
+        excluded: List[Tuple[str, str, bool]] = []
+        highlight_terms: List[str] = []
+        negate_next = False
+        join_next = False
+
+        for token in TOKEN_PATTERN.findall(q):
+            upper = token.upper()
+            if upper in ('AND', '&&'):
+                continue
+            if upper in ('OR', '||'):
+                join_next = bool(groups)
+                continue
+            if upper == 'NOT':
+                negate_next = True
+                continue
+
+            negated = negate_next or token.startswith('-')
+            raw = token[1:] if token.startswith('-') else token
+            term = self._clean(raw)
+            negate_next = False
+            if term is None:
+                continue
+            short = self._is_short(raw, term)
+            if negated:
+                excluded.append((raw, term, short))
+                join_next = False
+                continue
+
+            highlight_terms.append(raw.rstrip('*') if short else term.strip('"'))
+            if join_next:
+                groups[-1].append((raw, term, short))
+            else:
+                groups.append([(raw, term, short)])
+            join_next = False
+
+        if not groups:
+            # MySQL boolean mode returns nothing for a query made only of exclusions
+            return None
+
+        parts, regexp_groups, regexp_excluded = [], [], []
+        for group in groups:
+            if any(short for _, _, short in group):
+                regexp_groups.append('|'.join(self._term_regexp(*entry) for entry in group))
+            elif len(group) == 1:
+                parts.append(f"+{group[0][1]}")
+            else:
+                parts.append(f"+({' '.join(term for _, term, _ in group)})")
+        for raw, term, short in excluded:
+            if short:
+                regexp_excluded.append(self._term_regexp(raw, term, short))
+            elif parts:
+                parts.append(f"-{term}")
+            else:
+                # Without a positive FULLTEXT term the exclusion cannot go in MATCH either
+                regexp_excluded.append(self._term_regexp(raw, term, short))
+        return ParsedQuery(
+            boolean_query=' '.join(parts) or None,
+            highlight_terms=highlight_terms,
+            regexp_groups=regexp_groups,
+            regexp_excluded=regexp_excluded
+        )
+
+    def _text_matches(self, pattern: str):
+        return exists().where(
+            ExtractedText.candidate_id == Candidate.id,
+            ExtractedText.raw_text.regexp_match(pattern, flags='i')
+        )
+
+    def apply(self, db: Session, query: Query, parsed: ParsedQuery) -> Query:
+        """Restrict a Candidate query to full-text matches, best match first."""
+        for pattern in parsed.regexp_groups:
+            query = query.filter(self._text_matches(pattern))
+        for pattern in parsed.regexp_excluded:
+            query = query.filter(~self._text_matches(pattern))
+        if parsed.boolean_query is None:
+            return query
+
+        relevance = match(ExtractedText.raw_text, against=parsed.boolean_query).in_boolean_mode()
+        # A re-uploaded CV leaves several texts per candidate; the best-matching one ranks the candidate
+        scores = db.query(
+            ExtractedText.candidate_id.label('candidate_id'),
+            func.max(relevance).label('relevance')
+        ).filter(relevance > 0).group_by(ExtractedText.candidate_id).subquery()
+        return query.join(scores, scores.c.candidate_id == Candidate.id).order_by(scores.c.relevance.desc())
+
+    def highlight(self, text: Optional[str], terms: List[str]) -> List[str]:
+        if not text or not terms:
+            return []
+        patterns = []
+        for term in terms:
+            if term.endswith('*'):
+                patterns.append(re.escape(term[:-1]) + r'\w*')
+            else:
+                patterns.append(r'\s+'.join(re.escape(word) for word in term.split()))
+        pattern = re.compile(r'(?<!\w)(?:' + '|'.join(patterns) + r')(?!\w)', re.IGNORECASE)
+
+        snippets = []
+        last_end = -1
+        for found in pattern.finditer(text):
+            if found.start() < last_end:
+                continue
+            start = max(0, found.start() - self.snippet_window)
+            end = min(len(text), found.end() + self.snippet_window)
+            window = text[start:end]
+            marked = pattern.sub(lambda m: f"\0{m.group(0)}\1", window)
+            snippet = html.escape(' '.join(marked.split())).replace('\0', '<mark>').replace('\1', '</mark>')
+            snippets.append(('…' if start else '') + snippet + ('…' if end < len(text) else ''))
+            last_end = end
+            if len(snippets) >= self.max_snippets:
+                break
+        return snippets
+
+    def highlights_for(self, db: Session, candidate_ids: List[int], parsed: ParsedQuery) -> dict:
+        """Snippets for one page of results only, so highlighting cost does not grow with the match count."""
+        if not candidate_ids:
+            return {}
+        highlights = {}
+        rows = db.query(ExtractedText.candidate_id, ExtractedText.raw_text).filter(
+            ExtractedText.candidate_id.in_(candidate_ids)
+        ).order_by(ExtractedText.id.desc()).all()
+        for candidate_id, raw_text in rows:
+            if not highlights.get(candidate_id):
+                highlights[candidate_id] = self.highlight(raw_text, parsed.highlight_terms)
+        return highlights
+
+FULLTEXT_SEARCH_CONFIG = {
+    'min_token_size': int(os.getenv('FULLTEXT_MIN_TOKEN_SIZE', 3))
+}
+
+fulltext_search = FullTextSearch(**FULLTEXT_SEARCH_CONFIG)
@@ -0,0 +1,119 @@
+import os
+import logging
+from typing import Dict, Any, Tuple
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+from backend.services.matching_service import matching_service
+from backend.models.database import *
+from dotenv import load_dotenv
+load_dotenv()
+
+class MatchScoreStore:
+    """Materialized candidate_job_scores, kept current per job and per candidate instead of recomputed on read.
+
+    Nothing here commits; writes join the caller's transaction. A job refresh holds an exclusive lock on
+    the job row and candidate refreshes hold shared ones, so the two never interleave, and rows are
+    upserted so neither can trip over the other's inserts on uq_job_candidate.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.logger = logging.getLogger(__name__)
+        self.chunk_size = max(1, chunk_size)
+
+    def _upsert(self, db: Session, rows: list):
+        for start in range(0, len(rows), self.chunk_size):
+            stmt = insert(CandidateJobScore)
+            stmt = stmt.on_duplicate_key_update(
+                match_score=stmt.inserted.match_score,
+                matched_required_skills=stmt.inserted.matched_required_skills,
+                missing_required_skills=stmt.inserted.missing_required_skills,
+                matched_preferred_skills=stmt.inserted.matched_preferred_skills,
+                updated_at=func.current_timestamp()
+            )
+            db.execute(stmt, rows[start:start + self.chunk_size])
+
+    def _delete_pairs(self, db: Session, job_id: int, candidate_ids: list):
+        for start in range(0, len(candidate_ids), self.chunk_size):
+            db.query(CandidateJobScore).filter(
+                CandidateJobScore.job_id == job_id,
+                CandidateJobScore.candidate_id.in_(candidate_ids[start:start + self.chunk_size])
+            ).delete(synchronize_session=False)
+
+    def refresh_job(self, db: Session, job: JobRequirement):
+        db.query(JobRequirement.id).filter(JobRequirement.id == job.id).with_for_update().one()
+        index, spec, positions, scores = matching_service.score_all(db, job, fresh=True)
+
+        rows = [{
+            'job_id': job.id,
+            'candidate_id': int(index.candidate_ids[p]),
+            'match_score': round(float(score), 2),
+            'matched_required_skills': [s for s in spec['required'] if index.has_skill(s, p)],
+            'missing_required_skills': [s for s in spec['required'] if not index.has_skill(s, p)],
+            'matched_preferred_skills': [s for s in spec['preferred'] if index.has_skill(s, p)]
+        } for p, score in zip(positions, scores)]
+        self._upsert(db, rows)
+        # Only candidates in this index snapshot can be stale; newer ones are left to refresh_candidates
+        scored = {row['candidate_id'] for row in rows}
+        self._delete_pairs(db, job.id, [int(c) for c in index.candidate_ids if int(c) not in scored])
+
+        job.scores_computed_at = datetime.now()
+        self.logger.info(f"Materialized {len(rows)} match scores for job {job.id}")
+
+    def refresh_candidates(self, db: Session, profiles: Dict[int, Tuple[set, float, int]]):
+        """Recompute only the given candidates' rows; profiles come from MatchingService.candidate_profile."""
+        if not profiles:
+            return
+
+        # Jobs never materialized are filled in full on first read, so they are skipped here
+        jobs = db.query(JobRequirement).filter(
+            JobRequirement.scores_computed_at.isnot(None)
+        ).order_by(JobRequirement.id).with_for_update(read=True).all()
+        rows = []
+        for job in jobs:
+            spec = matching_service.job_spec(job)
+            ineligible = []
+            for candidate_id, (skills, experience_years, education_rank) in profiles.items():
+                score = matching_service.score_one(spec, skills, experience_years, education_rank)
+                if score is None:
+                    ineligible.append(candidate_id)
+                    continue
+                rows.append({
+                    'job_id': job.id,
+                    'candidate_id': candidate_id,
+                    'match_score': round(score, 2),
+                    'matched_required_skills': [s for s in spec['required'] if s in skills],
+                    'missing_required_skills': [s for s in spec['required'] if s not in skills],
+                    'matched_preferred_skills': [s for s in spec['preferred'] if s in skills]
+                })
+            self._delete_pairs(db, job.id, ineligible)
+        self._upsert(db, rows)
+
+    def top_matches(self, db: Session, job: JobRequirement, limit: int = 20) -> Dict[str, Any]:
+        rows = db.query(CandidateJobScore, Candidate.full_name, Candidate.overall_score).join(
+            Candidate, CandidateJobScore.candidate_id == Candidate.id
+        ).filter(
+            CandidateJobScore.job_id == job.id
+        ).order_by(CandidateJobScore.match_score.desc()).limit(limit).all()
+
+        return {
+            'job_id': job.id,
+            'job_title': job.job_title,
+            'scores_computed_at': job.scores_computed_at,
+            'matches': [{
+                'candidate_id': score.candidate_id,
+                'full_name': full_name,
+                'match_score': float(score.match_score),
+                'overall_score': float(overall_score) if overall_score else 0.0,
+                'matched_required_skills': score.matched_required_skills,
+                'missing_required_skills': score.missing_required_skills,
+                'matched_preferred_skills': score.matched_preferred_skills
+            } for score, full_name, overall_score in rows]
+        }
+
+MATCH_SCORE_STORE_CONFIG = {
+    'chunk_size': int(os.getenv('MATCH_SCORE_CHUNK_SIZE', 5000))
+}
+
+match_score_store = MatchScoreStore(**MATCH_SCORE_STORE_CONFIG)
@@ -0,0 +1,288 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.models.database import *
+from dotenv import load_dotenv
+load_dotenv()
+
+SKILL_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'golang': 'go',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'postgres': 'postgresql',
+    'k8s': 'kubernetes',
+    'c sharp': 'c#'
+}
+
+EDUCATION_RANK = {
+    EducationLevel.OTHER: 0,
+    EducationLevel.HIGH_SCHOOL: 1,
+    EducationLevel.ASSOCIATE: 2,
+    EducationLevel.BACHELOR: 3,
+    EducationLevel.MASTER: 4,
+    EducationLevel.PHD: 5
+}
+
+REQUIRED_WEIGHT = 0.7
+PREFERRED_WEIGHT = 0.3
+
+def normalize_skill(name: Any) -> Optional[str]:
+    if isinstance(name, dict):
+        name = name.get('skill_name') or name.get('name')
+    if not name:
+        return None
+    skill = re.sub(r'\s+', ' ', str(name)).strip().lower().rstrip('.,;:')
+    return SKILL_ALIASES.get(skill, skill) or None
+
+def _experience_months(start_date: date, end_date: Optional[date], today: date) -> int:
+    # Same month arithmetic as ClassificationService, so filters agree with displayed experience
+    end_date = end_date or today
+    return max(0, (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month))
+
+def _education_rank(level: Any) -> Optional[int]:
+    try:
+        return EDUCATION_RANK[level if isinstance(level, EducationLevel) else EducationLevel(str(level).upper())]
+    except (KeyError, ValueError):
+        return None
+
+class SkillIndex:
+    """Inverted index from normalized skill name to sorted candidate positions, plus per-candidate filter columns."""
+
+    def __init__(self, candidate_ids: np.ndarray, overall_scores: np.ndarray, experience_years: np.ndarray,
+                 education_ranks: np.ndarray, postings: Dict[str, np.ndarray], signature: Tuple):
+        self.candidate_ids = candidate_ids
+        self.overall_scores = overall_scores
+        self.experience_years = experience_years
+        self.education_ranks = education_ranks
+        self.postings = postings
+        self.signature = signature
+
+    @classmethod
+    def build(cls, db: Session, signature: Tuple) -> 'SkillIndex':
+        candidates = db.query(Candidate.id, Candidate.overall_score).order_by(Candidate.id).all()
+        candidate_ids = np.array([row.id for row in candidates], dtype=np.int64)
+        overall_scores = np.array([float(row.overall_score or 0) for row in candidates])
+        n = len(candidate_ids)
+
+        def position(candidate_id: int) -> int:
+            index = int(np.searchsorted(candidate_ids, candidate_id))
+            return index if index < n and candidate_ids[index] == candidate_id else -1
+
+        postings = defaultdict(set)
+        for candidate_id, skill_name in db.query(Skill.candidate_id, Skill.skill_name):
+            index, skill = position(candidate_id), normalize_skill(skill_name)
+            if index >= 0 and skill:
+                postings[skill].add(index)
+
+        today = date.today()
+        months = np.zeros(n)
+        for candidate_id, start_date, end_date in db.query(Experience.candidate_id, Experience.start_date, Experience.end_date):
+            index = position(candidate_id)
+            if index >= 0 and start_date:
+                months[index] += _experience_months(start_date, end_date, today)
+
+        education_ranks = np.full(n, -1, dtype=np.int8)
+        for candidate_id, level in db.query(Education.candidate_id, Education.education_level):
+            index, rank = position(candidate_id), _education_rank(level)
+            if index >= 0 and rank is not None:
+                education_ranks[index] = max(education_ranks[index], rank)
+
+        return cls(
+            candidate_ids=candidate_ids,
+            overall_scores=overall_scores,
+            experience_years=months / 12,
+            education_ranks=education_ranks,
+            postings={skill: np.array(sorted(positions), dtype=np.int64) for skill, positions in postings.items()},
+            signature=signature
+        )
+
+    def has_skill(self, skill: str, index: int) -> bool:
+        posting = self.postings.get(skill)
+        if posting is None:
+            return False
+        found = int(np.searchsorted(posting, index))
+        return found < len(posting) and posting[found] == index
+
+class MatchingService:
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger(__name__)
+        self._index: Optional[SkillIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _signature(self, db: Session) -> Tuple:
+        # Re-uploads replace skill rows and rescoring touches updated_at, so either moves the signature
+        skill_count, max_skill_id = db.query(func.count(Skill.id), func.max(Skill.id)).one()
+        candidate_count, last_update = db.query(func.count(Candidate.id), func.max(Candidate.updated_at)).one()
+        return (skill_count, max_skill_id, candidate_count, str(last_update))
+
+    def get_index(self, db: Session, fresh: bool = False) -> SkillIndex:
+        with self._lock:
+            now = time.time()
+            if not fresh and self._index is not None and now - self._checked_at < self.refresh_interval:
+                return self._index
+            signature = self._signature(db)
+            self._checked_at = now
+            if self._index is None or self._index.signature != signature:
+                start_time = time.perf_counter()
+                self._index = SkillIndex.build(db, signature)
+                self.logger.info(
+                    f"Built skill index over {len(self._index.candidate_ids)} candidates and "
+                    f"{len(self._index.postings)} skills in {time.perf_counter() - start_time:.2f}s"
+                )
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def _min_education_rank(self, requirements: Any) -> Optional[int]:
+        # Accepts "BACHELOR", ["BACHELOR", "MASTER"] (lowest listed wins) or {"min_level": "BACHELOR"}
+        if not requirements:
+            return None
+        if isinstance(requirements, dict):
+            requirements = requirements.get('min_level') or requirements.get('level')
+        if isinstance(requirements, (list, tuple)):
+            ranks = [_education_rank(level) for level in requirements]
+            ranks = [rank for rank in ranks if rank is not None]
+            return min(ranks) if ranks else None
+        return _education_rank(requirements)
+
+    def job_spec(self, job: JobRequirement) -> Dict[str, Any]:
+        required = list(dict.fromkeys(filter(None, map(normalize_skill, job.required_skills or []))))
+        preferred = [s for s in dict.fromkeys(filter(None, map(normalize_skill, job.preferred_skills or []))) if s not in required]
+        if required and preferred:
+            weights = (REQUIRED_WEIGHT, PREFERRED_WEIGHT)
+        else:
+            weights = (1.0, 0.0) if required else (0.0, 1.0)
+        return {
+            'required': required,
+            'preferred': preferred,
+            'weights': weights,
+            'min_years': job.min_experience_years or 0,
+            'min_rank': self._min_education_rank(job.education_requirements)
+        }
+
+    def score_all(self, db: Session, job: JobRequirement,
+                  fresh: bool = False) -> Tuple[SkillIndex, Dict[str, Any], np.ndarray, np.ndarray]:
+        """Score every indexed candidate against a job; returns eligible positions and their match scores."""
+        index = self.get_index(db, fresh)
+        spec = self.job_spec(job)
+        n = len(index.candidate_ids)
+
+        hits = {}
+        for group in ('required', 'preferred'):
+            counts = np.zeros(n)
+            for skill in spec[group]:
+                posting = index.postings.get(skill)
+                if posting is not None:
+                    counts[posting] += 1
+            hits[group] = counts
+
+        match_scores = 100 * (
+            spec['weights'][0] * (hits['required'] / max(len(spec['required']), 1)) +
+            spec['weights'][1] * (hits['preferred'] / max(len(spec['preferred']), 1))
+        )
+
+        eligible = np.ones(n, dtype=bool)
+        if spec['required'] or spec['preferred']:
+            eligible &= (hits['required'] + hits['preferred']) > 0
+        if spec['min_years']:
+            eligible &= index.experience_years >= spec['min_years']
+        if spec['min_rank'] is not None:
+            eligible &= index.education_ranks >= spec['min_rank']
+
+        positions = np.flatnonzero(eligible)
+        return index, spec, positions, match_scores[positions]
+
+    def candidate_profile(self, skills: List[Any], experiences: List[Any],
+                          educations: List[Any]) -> Tuple[set, float, int]:
+        """Skills, experience years and education rank from insert dicts or ORM rows, matching SkillIndex.build."""
+        def field(item: Any, name: str) -> Any:
+            return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+        today = date.today()
+        skill_set = set(filter(None, (normalize_skill(field(skill, 'skill_name')) for skill in skills)))
+        months = sum(
+            _experience_months(field(exp, 'start_date'), field(exp, 'end_date'), today)
+            for exp in experiences if field(exp, 'start_date')
+        )
+        ranks = [_education_rank(field(edu, 'education_level')) for edu in educations]
+        ranks = [rank for rank in ranks if rank is not None]
+        return skill_set, months / 12, max(ranks) if ranks else -1
+
+    def score_one(self, spec: Dict[str, Any], skills: set, experience_years: float,
+                  education_rank: int) -> Optional[float]:
+        """Scalar counterpart of score_all for a single candidate; None when the candidate is filtered out."""
+        required_hits = sum(1 for skill in spec['required'] if skill in skills)
+        preferred_hits = sum(1 for skill in spec['preferred'] if skill in skills)
+        if (spec['required'] or spec['preferred']) and not (required_hits + preferred_hits):
+            return None
+        if spec['min_years'] and experience_years < spec['min_years']:
+            return None
+        if spec['min_rank'] is not None and education_rank < spec['min_rank']:
+            return None
+        return 100 * (
+            spec['weights'][0] * (required_hits / max(len(spec['required']), 1)) +
+            spec['weights'][1] * (preferred_hits / max(len(spec['preferred']), 1))
+        )
+
+    def match(self, db: Session, job: JobRequirement, limit: int = 20) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        index, spec, positions, scores = self.score_all(db, job)
+        total_eligible = len(positions)
+
+        # overall_score (0-10) only breaks ties between equal skill coverage
+        keys = scores + index.overall_scores[positions] / 1000
+        if len(positions) > limit:
+            top = np.argpartition(-keys, limit - 1)[:limit]
+            positions, scores, keys = positions[top], scores[top], keys[top]
+        order = np.argsort(-keys, kind='stable')
+        positions, scores = positions[order], scores[order]
+
+        names = dict(db.query(Candidate.id, Candidate.full_name).filter(
+            Candidate.id.in_([int(index.candidate_ids[p]) for p in positions])
+        ).all()) if len(positions) else {}
+
+        matches = []
+        for p, score in zip(positions, scores):
+            candidate_id = int(index.candidate_ids[p])
+            matches.append({
+                'candidate_id': candidate_id,
+                'full_name': names.get(candidate_id),
+                'match_score': round(float(score), 2),
+                'overall_score': round(float(index.overall_scores[p]), 2),
+                'experience_years': round(float(index.experience_years[p]), 1),
+                'matched_required_skills': [s for s in spec['required'] if index.has_skill(s, p)],
+                'missing_required_skills': [s for s in spec['required'] if not index.has_skill(s, p)],
+                'matched_preferred_skills': [s for s in spec['preferred'] if index.has_skill(s, p)]
+            })
+
+        return {
+            'job_id': job.id,
+            'job_title': job.job_title,
+            'total_eligible': total_eligible,
+            'matches': matches,
+            'elapsed_ms': round((time.perf_counter() - start_time) * 1000, 2)
+        }
+
+MATCHING_CONFIG = {
+    'refresh_interval': float(os.getenv('MATCH_INDEX_REFRESH_SECONDS', 30))
+}
+
+matching_service = MatchingService(**MATCHING_CONFIG)
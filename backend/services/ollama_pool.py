@@ -0,0 +1,98 @@
+import time
+import logging
+import threading
+from typing import List, Optional, Iterable, Dict, Any
+from dataclasses import dataclass
+
+@dataclass
+class OllamaEndpoint:
+    base_url: str
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    total_requests: int = 0
+    total_failures: int = 0
+
+class OllamaEndpointPool:
+    def __init__(self, base_urls: List[str], failure_threshold: int = 3, cooldown_seconds: float = 30.0,
+                 health_check_interval: float = 15.0):
+        if not base_urls:
+            raise ValueError("At least one Ollama endpoint is required")
+        self.endpoints = [OllamaEndpoint(base_url=url.rstrip('/')) for url in base_urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.health_check_interval = health_check_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._last_health_check = 0.0
+
+    def _is_closed(self, endpoint: OllamaEndpoint, now: float) -> bool:
+        return endpoint.open_until <= now
+
+    def acquire(self, exclude: Iterable[OllamaEndpoint] = ()) -> Optional[OllamaEndpoint]:
+        now = time.time()
+        excluded = set(id(endpoint) for endpoint in exclude)
+        with self._lock:
+            remaining = [e for e in self.endpoints if id(e) not in excluded]
+            candidates = [e for e in remaining if self._is_closed(e, now)]
+            if not candidates:
+                # Every breaker is open; probing the one that recovers first beats failing the request
+                candidates = sorted(remaining, key=lambda e: e.open_until)[:1]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            endpoint.total_requests += 1
+            return endpoint
+
+    def release(self, endpoint: OllamaEndpoint, success: bool):
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if success:
+                endpoint.consecutive_failures = 0
+                endpoint.open_until = 0.0
+            else:
+                endpoint.total_failures += 1
+                self._record_failure(endpoint)
+
+    def _record_failure(self, endpoint: OllamaEndpoint):
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.open_until = time.time() + self.cooldown_seconds
+            self.logger.warning(f"Circuit opened for Ollama endpoint {endpoint.base_url}")
+
+    def health_check_due(self) -> bool:
+        now = time.time()
+        with self._lock:
+            if now - self._last_health_check < self.health_check_interval:
+                return False
+            self._last_health_check = now
+            return True
+
+    def record_health(self, endpoint: OllamaEndpoint, healthy: bool):
+        with self._lock:
+            if healthy:
+                if endpoint.open_until > time.time():
+                    self.logger.info(f"Ollama endpoint {endpoint.base_url} recovered")
+                endpoint.consecutive_failures = 0
+                endpoint.open_until = 0.0
+            else:
+                # A failed probe trips the breaker straight away instead of waiting for requests to fail
+                endpoint.consecutive_failures = max(endpoint.consecutive_failures, self.failure_threshold - 1)
+                self._record_failure(endpoint)
+
+    def any_available(self) -> bool:
+        now = time.time()
+        with self._lock:
+            return any(self._is_closed(e, now) for e in self.endpoints)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return [{
+                'base_url': e.base_url,
+                'outstanding': e.outstanding,
+                'circuit_open': not self._is_closed(e, now),
+                'total_requests': e.total_requests,
+                'total_failures': e.total_failures
+            } for e in self.endpoints]
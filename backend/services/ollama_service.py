@@ -1,11 +1,68 @@
 import requests
+import httpx
+import asyncio
 import json
 import os
 import logging
 # from dotenv import load_dotenv;
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Tuple, List
+from dataclasses import dataclass, field
 import time
+from backend.services.extraction_cache import ExtractionCache, extraction_cache
+from backend.services.rule_extractor import RuleBasedExtractor, rule_extractor
+from backend.services.ollama_pool import OllamaEndpoint, OllamaEndpointPool
+
+# Bump whenever _build_extraction_prompt or SECTION_SCHEMAS change so cached extractions are not reused
+PROMPT_VERSION = "1"
+
+SECTION_SCHEMAS = {
+    "personal_info": """{
+    "personal_info": {
+        "full_name": "Full Name",
+        "email": "email@example.com",
+        "phone": "Phone Number",
+        "address": "Full Address",
+        "linkedin": "LinkedIn profile URL",
+        "github": "GitHub profile URL"
+    }
+}""",
+    "education": """{
+    "education": [
+        {"degree": "Degree Name", "institution": "University Name", "graduation_year": 2023,
+         "gpa": 3.5, "major": "Major", "education_level": "Bachelor"}
+    ]
+}""",
+    "experience": """{
+    "experience": [
+        {"job_title": "Job Title", "company": "Company Name", "start_date": "2022-01", "end_date": "2023-12",
+         "is_current": false, "responsibilities": ["Responsibility 1"], "achievements": ["Achievement 1"]}
+    ]
+}""",
+    "skills": """{
+    "skills": [
+        {"skill_name": "Python", "category": "Technical", "proficiency_level": "Advanced", "years_experience": 3}
+    ]
+}""",
+    "projects": """{
+    "projects": [
+        {"project_name": "Project Name", "description": "Project Description", "technologies": ["Python"],
+         "project_url": "https://project.com", "github_url": "https://github.com/user/project"}
+    ]
+}""",
+    "certifications": """{
+    "certifications": [
+        {"certification_name": "AWS Certified", "issuing_organization": "Amazon",
+         "issue_date": "2023-06", "expiry_date": "2026-06"}
+    ]
+}""",
+    "languages": """{
+    "languages": [
+        {"language": "English", "proficiency": "Fluent"}
+    ]
+}"""
+}
+
+SECTION_NUM_PREDICT = 768
 
 @dataclass
 class ExtractionResult:
@@ -14,48 +71,196 @@ class ExtractionResult:
     confidence: float
     processing_time: float
     error_message: Optional[str] = None
+    cache_hit: bool = False
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    # False when the data came from the regex fallback after the model's JSON failed to parse
+    cacheable: bool = True
+
+class IncrementalJsonParser:
+    """Tracks the outermost JSON object in a token stream as it arrives."""
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+        self.start = None
+        self.end = None
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.complete = False
+        self._last_field_end = None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True if a top-level field finished inside it."""
+        field_completed = False
+        base = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        
+        for offset, char in enumerate(chunk):
+            if self.complete:
+                break
+            if self.start is None:
+                if char == '{':
+                    self.start = base + offset
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 1:
+                    field_completed = True
+                    self._last_field_end = base + offset + 1
+                elif self.depth == 0:
+                    self.complete = True
+                    self.end = base + offset + 1
+            elif char == ',' and self.depth == 1:
+                field_completed = True
+                self._last_field_end = base + offset
+        return field_completed
+
+    def partial(self) -> Optional[Dict[str, Any]]:
+        if self.start is None or self._last_field_end is None:
+            return None
+        try:
+            return json.loads(''.join(self._parts)[self.start:self._last_field_end].rstrip(',') + '}')
+        except json.JSONDecodeError:
+            return None
+
+    def text(self) -> str:
+        full_text = ''.join(self._parts)
+        if self.complete:
+            return full_text[self.start:self.end]
+        return full_text
 
 class OllamaService:
-    def __init__(self, host: str = "localhost", port: int = 11434, model: str = "llama3.2:3b"):
-        self.base_url = f"http://{host}:{port}"
+    def __init__(self, host: str = "localhost", port: int = 11434, model: str = "llama3.2:3b",
+                 request_timeout: float = 60.0, max_concurrent_requests: int = 4,
+                 stream: bool = True, rule_confidence_threshold: float = 0.85,
+                 chunked: bool = False, chunk_min_chars: int = 4000,
+                 endpoints: Optional[List[str]] = None, failure_threshold: int = 3,
+                 cooldown_seconds: float = 30.0, health_check_interval: float = 15.0,
+                 cache: Optional[ExtractionCache] = None, rules: Optional[RuleBasedExtractor] = None):
+        self.pool = OllamaEndpointPool(
+            endpoints or [f"http://{host}:{port}"],
+            failure_threshold=failure_threshold,
+            cooldown_seconds=cooldown_seconds,
+            health_check_interval=health_check_interval
+        )
+        self.base_url = self.pool.endpoints[0].base_url
         self.model = model
+        self.cache = cache
+        self.rules = rules
+        self.rule_confidence_threshold = rule_confidence_threshold
+        self.request_timeout = request_timeout
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.stream = stream
+        self.chunked = chunked
+        self.chunk_min_chars = chunk_min_chars
         self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._health_task: Optional[asyncio.Task] = None
         
     def is_available(self) -> bool:
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        self._check_health()
+        return self.pool.any_available()
+    
+    def _check_health(self):
+        for endpoint in self.pool.endpoints:
+            try:
+                response = self.session.get(f"{endpoint.base_url}/api/tags", timeout=5)
+                self.pool.record_health(endpoint, response.status_code == 200)
+            except:
+                self.pool.record_health(endpoint, False)
+    
+    async def _check_health_async(self):
+        client = self._get_async_client()
+        
+        async def probe(endpoint: OllamaEndpoint):
+            try:
+                response = await client.get(f"{endpoint.base_url}/api/tags", timeout=5)
+                self.pool.record_health(endpoint, response.status_code == 200)
+            except Exception:
+                self.pool.record_health(endpoint, False)
+        
+        await asyncio.gather(*(probe(endpoint) for endpoint in self.pool.endpoints))
+    
+    def _schedule_health_check(self):
+        if self.pool.health_check_due() and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.get_running_loop().create_task(self._check_health_async())
     
     def extract_resume_info(self, resume_text: str) -> ExtractionResult:
         start_time = time.time()
         
+        cache_key, cached_result = self._lookup_cache(resume_text, start_time)
+        if cached_result:
+            return cached_result
+        
+        rule_result = self._try_rules(resume_text, start_time)
+        if rule_result:
+            return rule_result
+        
         prompt = self._build_extraction_prompt(resume_text)
         
         try:
             response = self._call_ollama(prompt)
-            
-            if response:
-                extracted_data = self._parse_response(response)
-                confidence = self._calculate_confidence(extracted_data)
-                processing_time = time.time() - start_time
-                
-                return ExtractionResult(
-                    success=True,
-                    data=extracted_data,
-                    confidence=confidence,
-                    processing_time=processing_time
-                )
+            result = self._build_result(response, start_time)
+            self._store_cache(cache_key, result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error extracting resume info: {str(e)}")
+            return ExtractionResult(
+                success=False,
+                data={},
+                confidence=0.0,
+                processing_time=time.time() - start_time,
+                error_message=str(e)
+            )
+    
+    async def extract_resume_info_async(self, resume_text: str,
+                                        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> ExtractionResult:
+        start_time = time.time()
+        
+        cache_key, cached_result = self._lookup_cache(resume_text, start_time)
+        if cached_result:
+            return cached_result
+        
+        rule_result = self._try_rules(resume_text, start_time)
+        if rule_result:
+            return rule_result
+        
+        if self.chunked and self.rules and len(resume_text) >= self.chunk_min_chars:
+            chunked_result = await self._extract_sections_async(resume_text, start_time)
+            if chunked_result:
+                self._store_cache(cache_key, chunked_result)
+                return chunked_result
+        
+        prompt = self._build_extraction_prompt(resume_text)
+        
+        try:
+            if self.stream:
+                response, metrics = await self._call_ollama_stream_async(prompt, on_partial)
             else:
-                return ExtractionResult(
-                    success=False,
-                    data={},
-                    confidence=0.0,
-                    processing_time=time.time() - start_time,
-                    error_message="No response from Ollama"
-                )
-                
+                response, metrics = await self._call_ollama_async(prompt), {}
+            result = self._build_result(response, start_time)
+            result.metrics = metrics
+            self._store_cache(cache_key, result)
+            return result
         except Exception as e:
             self.logger.error(f"Error extracting resume info: {str(e)}")
             return ExtractionResult(
@@ -66,6 +271,132 @@ class OllamaService:
                 error_message=str(e)
             )
     
+    async def _extract_sections_async(self, resume_text: str, start_time: float) -> Optional[ExtractionResult]:
+        sections = {
+            key: text for key, text in self.rules.split_text_sections(resume_text).items()
+            if key in SECTION_SCHEMAS and text.strip()
+        }
+        # Not enough structure to split on; the single full prompt does better
+        if len(sections) < 2:
+            return None
+        
+        keys = list(sections)
+        responses = await asyncio.gather(*(
+            self._call_ollama_async(self._build_section_prompt(key, sections[key]), SECTION_NUM_PREDICT)
+            for key in keys
+        ))
+        
+        data = {
+            "personal_info": {},
+            "education": [],
+            "experience": [],
+            "skills": [],
+            "projects": [],
+            "certifications": [],
+            "languages": []
+        }
+        failed_sections = []
+        for key, response in zip(keys, responses):
+            if not response:
+                failed_sections.append(key)
+                continue
+            section, parsed = self._parse_response(response)
+            if not parsed:
+                failed_sections.append(key)
+            value = section.get(key)
+            if value:
+                data[key] = value
+        
+        if len(failed_sections) == len(keys):
+            return None
+        
+        # Contact details are often outside the header block; fill gaps deterministically
+        for field_name, value in self.rules.extract_personal_info(resume_text).items():
+            if not data["personal_info"].get(field_name):
+                data["personal_info"][field_name] = value
+        
+        return ExtractionResult(
+            success=True,
+            data=data,
+            confidence=self._calculate_confidence(data),
+            processing_time=time.time() - start_time,
+            metrics={'extractor': 'chunked', 'sections': keys, 'failed_sections': failed_sections},
+            cacheable=not failed_sections
+        )
+    
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+    
+    def _lookup_cache(self, resume_text: str, start_time: float):
+        if not self.cache:
+            return None, None
+        
+        cache_key = self.cache.make_key(resume_text, self.model, PROMPT_VERSION)
+        cached = self.cache.get(cache_key)
+        if not cached:
+            return cache_key, None
+        
+        self.logger.info("Extraction cache hit, skipping Ollama")
+        return cache_key, ExtractionResult(
+            success=True,
+            data=cached['data'],
+            confidence=cached['confidence'],
+            processing_time=time.time() - start_time,
+            cache_hit=True
+        )
+    
+    def _try_rules(self, resume_text: str, start_time: float) -> Optional[ExtractionResult]:
+        if not self.rules:
+            return None
+        
+        try:
+            data = self.rules.extract(resume_text)
+        except Exception as e:
+            self.logger.warning(f"Rule-based extraction failed: {str(e)}")
+            return None
+        
+        confidence = self._rule_confidence(data)
+        if confidence < self.rule_confidence_threshold:
+            return None
+        
+        self.logger.info(f"Rule-based extraction confident ({confidence}), skipping Ollama")
+        return ExtractionResult(
+            success=True,
+            data=data,
+            confidence=confidence,
+            processing_time=time.time() - start_time,
+            metrics={'extractor': 'rules'}
+        )
+    
+    def _store_cache(self, cache_key: Optional[str], result: ExtractionResult):
+        if self.cache and cache_key and result.success and result.cacheable and result.confidence > 0:
+            self.cache.set(cache_key, result.data, result.confidence)
+    
+    def _build_result(self, response: Optional[str], start_time: float) -> ExtractionResult:
+        if response:
+            extracted_data, parsed = self._parse_response(response)
+            confidence = self._calculate_confidence(extracted_data)
+            processing_time = time.time() - start_time
+            
+            return ExtractionResult(
+                success=True,
+                data=extracted_data,
+                confidence=confidence,
+                processing_time=processing_time,
+                cacheable=parsed
+            )
+        else:
+            return ExtractionResult(
+                success=False,
+                data={},
+                confidence=0.0,
+                processing_time=time.time() - start_time,
+                error_message="No response from Ollama"
+            )
+    
     def _build_extraction_prompt(self, resume_text: str) -> str:
         return f"""
 You are a CV/Resume analysis expert. Extract information from the resume below and return the result in JSON format with the following structure:
@@ -143,24 +474,87 @@ Resume text:
 {resume_text}
 """
 
-    def _call_ollama(self, prompt: str) -> Optional[str]:
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,  
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "num_predict": 2048
-                }
+    def _build_section_prompt(self, section: str, section_text: str) -> str:
+        return f"""
+You are a CV/Resume analysis expert. Below is the "{section}" part of a resume. Extract it and return the result in JSON format with the following structure:
+
+{SECTION_SCHEMAS[section]}
+
+IMPORTANT:
+	1.	Only return JSON, no extra text
+	2.	If any information is missing, use null or an empty array
+	3.	Use YYYY-MM or YYYY format for all dates
+	4.	Convert GPA to 4.0 scale if necessary
+
+Resume section text:
+{section_text}
+"""
+
+    def _build_payload(self, prompt: str, num_predict: int = 2048) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": 0.1,  
+                "top_k": 40,
+                "top_p": 0.9,
+                "num_predict": num_predict
             }
+        }
+
+    def _call_ollama(self, prompt: str) -> Optional[str]:
+        if self.pool.health_check_due():
+            self._check_health()
+        
+        payload = self._build_payload(prompt)
+        tried = []
+        for _ in range(len(self.pool.endpoints)):
+            endpoint = self.pool.acquire(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            
+            result = self._post_generate(endpoint, payload)
+            self.pool.release(endpoint, result is not None)
+            if result is not None:
+                return result
+            self.logger.warning(f"Ollama endpoint {endpoint.base_url} failed, trying another")
+        return None
+    
+    def embed(self, text: str, model: str) -> Optional[List[float]]:
+        tried = []
+        for _ in range(len(self.pool.endpoints)):
+            endpoint = self.pool.acquire(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            
+            embedding = None
+            try:
+                response = self.session.post(
+                    f"{endpoint.base_url}/api/embeddings",
+                    json={"model": model, "prompt": text},
+                    timeout=self.request_timeout
+                )
+                if response.status_code == 200:
+                    embedding = response.json().get('embedding') or None
+                else:
+                    self.logger.error(f"Ollama embeddings error: {response.status_code} - {response.text}")
+            except Exception as e:
+                self.logger.error(f"Ollama embeddings call failed: {str(e)}")
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
+            self.pool.release(endpoint, embedding is not None)
+            if embedding is not None:
+                return embedding
+        return None
+    
+    def _post_generate(self, endpoint: OllamaEndpoint, payload: Dict[str, Any]) -> Optional[str]:
+        try:
+            response = self.session.post(
+                f"{endpoint.base_url}/api/generate",
                 json=payload,
-                timeout=60
+                timeout=self.request_timeout
             )
             
             if response.status_code == 200:
@@ -178,24 +572,151 @@ Resume text:
             self.logger.error(f"Ollama API call failed: {str(e)}")
             return None
     
-    def _parse_response(self, response: str) -> Dict[str, Any]:
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # httpx clients and semaphores are bound to the loop they were created on,
+        # and Celery workers start a fresh loop per batch
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            # The concurrency cap is per backend so throughput grows with the pool
+            total_requests = self.max_concurrent_requests * len(self.pool.endpoints)
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.request_timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=total_requests,
+                    max_keepalive_connections=total_requests
+                )
+            )
+            self._async_semaphore = asyncio.Semaphore(total_requests)
+            self._async_loop = loop
+            self._health_task = None
+        return self._async_client
+    
+    async def _with_failover_async(self, call: Callable[[OllamaEndpoint], Any]):
+        self._get_async_client()
+        self._schedule_health_check()
+        
+        tried = []
+        result = None
+        for _ in range(len(self.pool.endpoints)):
+            endpoint = self.pool.acquire(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+            
+            result = None
+            try:
+                result = await call(endpoint)
+            finally:
+                self.pool.release(endpoint, result is not None and result[0] is not None)
+            if result[0] is not None:
+                return result
+            self.logger.warning(f"Ollama endpoint {endpoint.base_url} failed, trying another")
+        return result
+    
+    async def _call_ollama_async(self, prompt: str, num_predict: int = 2048) -> Optional[str]:
+        payload = self._build_payload(prompt, num_predict)
+        result = await self._with_failover_async(lambda endpoint: self._post_generate_async(endpoint, payload))
+        return result[0] if result else None
+    
+    async def _post_generate_async(self, endpoint: OllamaEndpoint, payload: Dict[str, Any]) -> Tuple[Optional[str], None]:
+        client = self._get_async_client()
+        try:
+            async with self._async_semaphore:
+                response = await client.post(f"{endpoint.base_url}/api/generate", json=payload)
+            
+            if response.status_code == 200:
+                return response.json().get('response', ''), None
+            else:
+                self.logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                return None, None
+                
+        except httpx.TimeoutException:
+            self.logger.error("Ollama API timeout")
+            return None, None
+        except Exception as e:
+            self.logger.error(f"Ollama API call failed: {str(e)}")
+            return None, None
+    
+    async def _call_ollama_stream_async(self, prompt: str,
+                                        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+                                        ) -> Tuple[Optional[str], Dict[str, Any]]:
+        payload = self._build_payload(prompt)
+        payload["stream"] = True
+        result = await self._with_failover_async(
+            lambda endpoint: self._stream_generate_async(endpoint, payload, on_partial)
+        )
+        return result if result else (None, {})
+    
+    async def _stream_generate_async(self, endpoint: OllamaEndpoint, payload: Dict[str, Any],
+                                     on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+                                     ) -> Tuple[Optional[str], Dict[str, Any]]:
+        client = self._get_async_client()
+        parser = IncrementalJsonParser()
+        metrics = {'streamed': True, 'total_tokens': 0, 'time_to_first_field': None, 'stopped_early': False,
+                   'endpoint': endpoint.base_url}
+        start_time = time.time()
+        
+        try:
+            async with self._async_semaphore:
+                async with client.stream("POST", f"{endpoint.base_url}/api/generate", json=payload) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        self.logger.error(f"Ollama API error: {response.status_code} - {body.decode(errors='replace')}")
+                        return None, metrics
+                    
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        token = chunk.get('response', '')
+                        if token:
+                            metrics['total_tokens'] += 1
+                        
+                        if parser.feed(token):
+                            if metrics['time_to_first_field'] is None:
+                                metrics['time_to_first_field'] = round(time.time() - start_time, 3)
+                            if on_partial:
+                                partial = parser.partial()
+                                if partial:
+                                    on_partial(partial)
+                        
+                        if chunk.get('done'):
+                            metrics['total_tokens'] = chunk.get('eval_count', metrics['total_tokens'])
+                            break
+                        # Leaving the stream context closes the connection, which makes Ollama
+                        # abort generation instead of producing trailing text
+                        if parser.complete:
+                            metrics['stopped_early'] = True
+                            break
+            
+            return parser.text(), metrics
+                
+        except httpx.TimeoutException:
+            self.logger.error("Ollama API timeout")
+            return None, metrics
+        except Exception as e:
+            self.logger.error(f"Ollama API call failed: {str(e)}")
+            return None, metrics
+    
+    def _parse_response(self, response: str) -> Tuple[Dict[str, Any], bool]:
+        """Parsed data, and whether it really came from the model's JSON rather than a fallback."""
         try:
             start_idx = response.find('{')
             end_idx = response.rfind('}') + 1
             
             if start_idx != -1 and end_idx != -1:
                 json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
+                return json.loads(json_str), True
             else:
                 self.logger.warning("No JSON found in response")
-                return {}
+                return {}, False
                 
         except json.JSONDecodeError as e:
             self.logger.error(f"JSON decode error: {str(e)}")
-            return self._fallback_extraction(response)
+            return self._fallback_extraction(response), False
         except Exception as e:
             self.logger.error(f"Response parsing error: {str(e)}")
-            return {}
+            return {}, False
     
     def _fallback_extraction(self, text: str) -> Dict[str, Any]:
         import re
@@ -224,6 +745,21 @@ Resume text:
         
         return result
     
+    def _rule_confidence(self, extracted_data: Dict[str, Any]) -> float:
+        """Confidence for the regex extractor, scored over every field whether or not it was found.
+
+        Without both experience and education the result is never trusted: contact details alone
+        are easy to match and say little about the rest of the CV.
+        """
+        if not extracted_data.get("experience") or not extracted_data.get("education"):
+            return 0.0
+        personal_info = extracted_data.get("personal_info", {})
+        filled_fields = 2  # experience and education
+        filled_fields += sum(1 for field in ["full_name", "email", "phone"] if personal_info.get(field))
+        if extracted_data.get("skills"):
+            filled_fields += 1
+        return round(filled_fields / 6, 2)
+    
     def _calculate_confidence(self, extracted_data: Dict[str, Any]) -> float:
         total_fields = 0
         filled_fields = 0
@@ -255,7 +791,17 @@ Resume text:
 OLLAMA_CONFIG = {
     'host': os.getenv('OLLAMA_HOST', 'localhost'),
     'port': int(os.getenv('OLLAMA_PORT', 11434)),
-    'model': os.getenv('OLLAMA_MODEL', 'llama3.2:3b')
+    'model': os.getenv('OLLAMA_MODEL', 'llama3.2:3b'),
+    'endpoints': [url.strip() for url in os.getenv('OLLAMA_ENDPOINTS', '').split(',') if url.strip()],
+    'failure_threshold': int(os.getenv('OLLAMA_FAILURE_THRESHOLD', 3)),
+    'cooldown_seconds': float(os.getenv('OLLAMA_COOLDOWN_SECONDS', 30)),
+    'health_check_interval': float(os.getenv('OLLAMA_HEALTH_CHECK_INTERVAL', 15)),
+    'request_timeout': float(os.getenv('OLLAMA_TIMEOUT', 60)),
+    'max_concurrent_requests': int(os.getenv('OLLAMA_MAX_CONCURRENT_REQUESTS', 4)),
+    'stream': os.getenv('OLLAMA_STREAM', 'true').lower() == 'true',
+    'rule_confidence_threshold': float(os.getenv('RULE_EXTRACTION_THRESHOLD', 0.85)),
+    'chunked': os.getenv('OLLAMA_CHUNKED', 'false').lower() == 'true',
+    'chunk_min_chars': int(os.getenv('OLLAMA_CHUNK_MIN_CHARS', 4000))
 }
 
-ollama_service = OllamaService(**OLLAMA_CONFIG)
\ No newline at end of file
+ollama_service = OllamaService(**OLLAMA_CONFIG, cache=extraction_cache, rules=rule_extractor)
\ No newline at end of file
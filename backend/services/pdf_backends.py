@@ -0,0 +1,127 @@
+import io
+import time
+import logging
+from typing import Dict, Any, List, Callable, Tuple, Iterable, Optional
+from dataclasses import dataclass, field
+import PyPDF2
+
+# text, page_count, pages_extracted, truncated
+BackendOutput = Tuple[str, int, int, bool]
+
+@dataclass
+class PdfProfile:
+    page_count: int
+    font_count: int
+    image_count: int
+    # None when the document could not be profiled, so no backend can be ruled out
+    has_text_layer: Optional[bool]
+    reader: Any = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'page_count': self.page_count,
+            'font_count': self.font_count,
+            'image_count': self.image_count,
+            'has_text_layer': self.has_text_layer
+        }
+
+@dataclass
+class PdfBackend:
+    name: str
+    extract: Callable[[io.BytesIO, PdfProfile], BackendOutput]
+    can_handle: Callable[[PdfProfile], bool]
+    # Rough relative cost; cheaper backends are tried first
+    seconds_per_page: float = 0.05
+
+class PdfBackendRegistry:
+    def __init__(self, sample_pages: int = 3, min_chars_per_page: int = 50):
+        self.sample_pages = sample_pages
+        self.min_chars_per_page = min_chars_per_page
+        self.logger = logging.getLogger(__name__)
+        self._backends: Dict[str, PdfBackend] = {}
+
+    def register(self, backend: PdfBackend):
+        self._backends[backend.name] = backend
+
+    def profile(self, buffer: io.BytesIO) -> PdfProfile:
+        buffer.seek(0)
+        fonts = set()
+        image_count = 0
+        try:
+            reader = PyPDF2.PdfReader(buffer)
+            page_count = len(reader.pages)
+            for index in range(min(page_count, self.sample_pages)):
+                resources = reader.pages[index].get('/Resources')
+                if resources is None:
+                    continue
+                resources = resources.get_object()
+                font_dict = resources.get('/Font')
+                if font_dict is not None:
+                    fonts.update(font_dict.get_object().keys())
+                xobjects = resources.get('/XObject')
+                if xobjects is not None:
+                    for xobject in xobjects.get_object().values():
+                        if xobject.get_object().get('/Subtype') == '/Image':
+                            image_count += 1
+        except Exception as e:
+            # PyPDF2 is stricter than pdfplumber; a file it rejects may still be readable
+            self.logger.warning(f"Could not profile PDF, trying every backend: {str(e)}")
+            return PdfProfile(page_count=0, font_count=0, image_count=0, has_text_layer=None)
+
+        return PdfProfile(
+            page_count=page_count,
+            font_count=len(fonts),
+            image_count=image_count,
+            has_text_layer=bool(fonts),
+            reader=reader
+        )
+
+    def route(self, profile: PdfProfile, exclude: Iterable[str] = ()) -> List[PdfBackend]:
+        allowed = [backend for backend in self._backends.values() if backend.name not in exclude]
+        if profile.has_text_layer is None:
+            candidates = allowed
+        else:
+            candidates = [backend for backend in allowed if backend.can_handle(profile)]
+        if not candidates:
+            # Fonts can hide in form XObjects; a misclassified PDF is better tried by everything than dropped
+            candidates = allowed
+        return sorted(candidates, key=lambda backend: backend.seconds_per_page)
+
+    def extract(self, buffer: io.BytesIO, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        profile = self.profile(buffer)
+        attempts = []
+        output: BackendOutput = ("", profile.page_count, 0, False)
+        chosen = None
+        best_chars = -1
+
+        for backend in self.route(profile, exclude):
+            buffer.seek(0)
+            start_time = time.perf_counter()
+            try:
+                result = backend.extract(buffer, profile)
+            except Exception as e:
+                self.logger.warning(f"PDF backend {backend.name} failed: {str(e)}")
+                attempts.append({'backend': backend.name, 'error': str(e)})
+                continue
+            elapsed = time.perf_counter() - start_time
+
+            text, _, pages_extracted, _ = result
+            chars = len(text.strip())
+            attempts.append({
+                'backend': backend.name,
+                'seconds': round(elapsed, 4),
+                'pages': pages_extracted,
+                'chars': chars
+            })
+            if chars > best_chars:
+                output, chosen, best_chars = result, backend.name, chars
+            # A near-empty yield means this backend could not read the layout; try the next one
+            if chars >= self.min_chars_per_page * max(1, pages_extracted):
+                break
+
+        return {
+            'output': output,
+            'backend': chosen,
+            'attempts': attempts,
+            'profile': profile.to_dict()
+        }
@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+from functools import lru_cache
+from itertools import compress
+from typing import Dict, Any, Tuple
+from datetime import date
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from backend.services.classification_service import (
+    SENIOR_TITLE_WORDS, MID_TITLE_WORDS, LEAD_TITLE_WORDS,
+    EDUCATION_LEVEL_POINTS, PROFICIENCY_POINTS, SCORE_WEIGHTS
+)
+from backend.services.resume_processor import celery_app
+from backend.models.database import *
+from backend.database.config import SessionLocal
+from dotenv import load_dotenv
+load_dotenv()
+
+# Index order matches the np.select branches in _score_experience
+LEVELS = [ExperienceLevel.LEAD, ExperienceLevel.SENIOR, ExperienceLevel.MID, ExperienceLevel.ENTRY]
+
+@lru_cache(maxsize=65536)
+def _title_traits(job_title: str) -> Tuple[int, bool, bool]:
+    # Titles repeat heavily across CVs, so each distinct one is classified once
+    title = job_title.lower()
+    if any(word in title for word in SENIOR_TITLE_WORDS):
+        quality, senior = 3, True
+    elif any(word in title for word in MID_TITLE_WORDS):
+        quality, senior = 2, False
+    else:
+        quality, senior = 1, False
+    return quality, senior, any(word in title for word in LEAD_TITLE_WORDS)
+
+def _month_index(dates) -> np.ndarray:
+    # Months since epoch, NaT where the date is missing
+    return np.array(dates, dtype='datetime64[D]').astype('datetime64[M]')
+
+class RescoringService:
+    """Recompute overall_score, experience_level and classification for every candidate at once.
+
+    Mirrors ClassificationService.score, but over columnar arrays instead of one candidate at a time.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.logger = logging.getLogger(__name__)
+        self.chunk_size = max(1, chunk_size)
+
+    def rescore_all(self, db: Session, today: date = None) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        today_month = np.datetime64(today or date.today(), 'M')
+
+        candidate_ids = np.fromiter(db.execute(select(Candidate.id).order_by(Candidate.id)).scalars(), dtype=np.int64)
+        n = len(candidate_ids)
+        if n == 0:
+            return {'candidates': 0, 'seconds': 0.0}
+
+        experience_score, levels, titles = self._score_experience(db, candidate_ids, today_month)
+        education_score = self._score_education(db, candidate_ids)
+        skills_score = self._score_skills(db, candidate_ids)
+
+        overall = np.round(
+            experience_score * SCORE_WEIGHTS['experience'] +
+            education_score * SCORE_WEIGHTS['education'] +
+            skills_score * SCORE_WEIGHTS['skills'],
+            2
+        )
+        load_seconds = time.perf_counter() - start_time
+
+        self._write_back(db, candidate_ids, overall, levels, titles)
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"Rescored {n} candidates in {elapsed:.2f}s (scoring {load_seconds:.2f}s)")
+        return {
+            'candidates': n,
+            'seconds': round(elapsed, 3),
+            'scoring_seconds': round(load_seconds, 3),
+            'mean_score': round(float(overall.mean()), 2)
+        }
+
+    def _align(self, candidate_ids: np.ndarray, rows: list) -> Tuple[np.ndarray, list]:
+        """Position of each child row's candidate, dropping rows whose candidate is not in candidate_ids.
+
+        Candidates inserted or deleted after the ID snapshot would otherwise land on a neighbour's slot.
+        """
+        row_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        pos = np.minimum(np.searchsorted(candidate_ids, row_ids), len(candidate_ids) - 1)
+        known = candidate_ids[pos] == row_ids
+        if not known.all():
+            rows = list(compress(rows, known))
+            pos = pos[known]
+        return pos, rows
+
+    def _score_experience(self, db: Session, candidate_ids: np.ndarray, today_month: np.datetime64):
+        n = len(candidate_ids)
+        rows = db.execute(
+            select(Experience.candidate_id, Experience.start_date, Experience.end_date, Experience.job_title)
+            .where(Experience.candidate_id <= int(candidate_ids[-1]))
+            .order_by(Experience.id)
+        ).all()
+        pos, rows = self._align(candidate_ids, rows)
+        titles = np.full(n, None, dtype=object)
+        if not rows:
+            return np.zeros(n), np.full(n, 3), titles
+
+        _, starts, ends, job_titles = zip(*rows)
+        start = _month_index(starts)
+        end = _month_index(ends)
+        end = np.where(np.isnat(end), today_month, end)
+        has_start = ~np.isnat(start)
+        months = np.where(has_start, np.maximum((end - start).astype(np.int64), 0), 0)
+
+        traits = np.array([_title_traits(title or '') for title in job_titles], dtype=np.int64)
+        count = np.bincount(pos, minlength=n)
+        total_years = np.bincount(pos, weights=months, minlength=n) / 12
+        quality_sum = np.bincount(pos, weights=traits[:, 0], minlength=n)
+        has_senior = np.bincount(pos, weights=traits[:, 1], minlength=n) > 0
+        has_lead = np.bincount(pos, weights=traits[:, 2], minlength=n) > 0
+
+        years_score = np.minimum(total_years / 10, 1.0) * 7
+        quality_score = np.minimum(np.divide(quality_sum, count * 3, out=np.zeros(n), where=count > 0), 1.0) * 3
+        score = np.where(count > 0, years_score + quality_score, 0.0)
+
+        levels = np.select(
+            [count == 0, has_lead & (total_years >= 5), has_senior | (total_years >= 5), total_years >= 2],
+            [3, 0, 1, 2],
+            default=3
+        )
+
+        # Latest role: greatest start date, earliest row on ties or when no start dates are known
+        start_key = np.where(has_start, start.astype(np.int64), np.iinfo(np.int64).min)
+        row_order = np.arange(len(pos))
+        order = np.lexsort((-row_order, start_key, pos))
+        last_in_group = np.r_[pos[order][1:] != pos[order][:-1], True]
+        latest_rows = order[last_in_group]
+        titles[pos[latest_rows]] = np.asarray(job_titles, dtype=object)[latest_rows]
+        return score, levels, titles
+
+    def _score_education(self, db: Session, candidate_ids: np.ndarray) -> np.ndarray:
+        n = len(candidate_ids)
+        rows = db.execute(
+            select(Education.candidate_id, Education.education_level, Education.gpa)
+            .where(Education.candidate_id <= int(candidate_ids[-1]))
+        ).all()
+        pos, rows = self._align(candidate_ids, rows)
+        score = np.zeros(n)
+        if not rows:
+            return score
+
+        _, education_levels, gpas = zip(*rows)
+        points = np.fromiter((EDUCATION_LEVEL_POINTS.get(level, 1) for level in education_levels), dtype=float, count=len(pos))
+        gpa = np.array([float(g) if g is not None else 0.0 for g in gpas])
+        points += np.select([gpa >= 3.5, gpa >= 3.0], [1.0, 0.5], default=0.0)
+        np.maximum.at(score, pos, points)
+        return np.minimum(score, 10.0)
+
+    def _score_skills(self, db: Session, candidate_ids: np.ndarray) -> np.ndarray:
+        n = len(candidate_ids)
+        rows = db.execute(
+            select(Skill.candidate_id, Skill.proficiency_level).where(
+                Skill.skill_category == SkillCategory.TECHNICAL,
+                Skill.candidate_id <= int(candidate_ids[-1])
+            )
+        ).all()
+        pos, rows = self._align(candidate_ids, rows)
+        if not rows:
+            return np.zeros(n)
+
+        _, proficiencies = zip(*rows)
+        points = np.fromiter((PROFICIENCY_POINTS.get(level, 0.2) for level in proficiencies), dtype=float, count=len(pos))
+        return np.minimum(np.bincount(pos, weights=points, minlength=n) / 2, 10.0)
+
+    def _write_back(self, db: Session, candidate_ids: np.ndarray, overall: np.ndarray, levels: np.ndarray,
+                    titles: np.ndarray):
+        for start in range(0, len(candidate_ids), self.chunk_size):
+            stop = start + self.chunk_size
+            rows = []
+            for candidate_id, score, level_index, title in zip(
+                candidate_ids[start:stop], overall[start:stop], levels[start:stop], titles[start:stop]
+            ):
+                level = LEVELS[level_index]
+                rows.append({
+                    'id': int(candidate_id),
+                    'overall_score': float(score),
+                    'experience_level': level,
+                    'classification': f"{level.value} {title or 'Professional'}"
+                })
+            # ORM bulk UPDATE by primary key: one executemany per chunk
+            db.execute(update(Candidate), rows)
+            db.commit()
+
+RESCORING_CONFIG = {
+    'chunk_size': int(os.getenv('RESCORE_CHUNK_SIZE', 5000))
+}
+
+rescoring_service = RescoringService(**RESCORING_CONFIG)
+
+@celery_app.task(name='rescoring.rescore_candidates')
+def rescore_candidates_task():
+    db = SessionLocal()
+    try:
+        return rescoring_service.rescore_all(db)
+    finally:
+        db.close()
@@ -1,28 +1,80 @@
+import os
 import uuid
+import shutil
+import hashlib
 import asyncio
 from typing import List, Dict, Any, Tuple
+from collections import Counter
+from sqlalchemy import insert, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from backend.services.s3_service import s3_service
 from backend.services.file_processor import file_processor
+from backend.services.textract_service import textract_service
 from backend.services.ollama_service import ollama_service
+from backend.services.extraction_cache import extraction_cache
 from backend.services.classification_service import ClassificationService
+from backend.services.matching_service import matching_service
+from backend.services.match_score_store import match_score_store
+from backend.services.semantic_search import semantic_search
 from backend.models.database import *
 from backend.database.config import SessionLocal
+from celery import Celery
 from dotenv import load_dotenv
 load_dotenv()
 
+celery_app = Celery(
+    'resume_processor',
+    broker=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+    include=['backend.services.candidate_cleanup', 'backend.services.rescoring_service']
+)
+CELERY_TASK_TIME_LIMIT = int(os.getenv('CELERY_TASK_TIME_LIMIT', 3 * 3600 + 300))
+celery_app.conf.update(
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # Outer bound for a whole batch; each file is also bounded by EXTRACTION_TIMEOUT
+    task_soft_time_limit=int(os.getenv('CELERY_TASK_SOFT_TIME_LIMIT', 3 * 3600)),
+    task_time_limit=CELERY_TASK_TIME_LIMIT,
+    # Redis redelivers unacknowledged tasks after the visibility timeout (1h by default), which
+    # with acks_late would start a second copy of any batch still running
+    broker_transport_options={'visibility_timeout': CELERY_TASK_TIME_LIMIT + 600},
+    # Recycle pool children so memory leaked by parsers and the LLM client is returned
+    worker_max_tasks_per_child=int(os.getenv('CELERY_MAX_TASKS_PER_CHILD', 20)),
+    worker_max_memory_per_child=int(os.getenv('CELERY_MAX_MEMORY_PER_CHILD_MB', 2048)) * 1024
+)
+
+class BatchInProgress(Exception):
+    """The batch is held by another run whose heartbeat is still fresh."""
+
 class ResumeProcessor:
-    def __init__(self):
+    def __init__(self, concurrency: int = 1, spool_dir: str = "uploads", llm_max_chars: int = 20000,
+                 heartbeat_interval: int = 30, batch_lease_seconds: int = 300, partial_commit_interval: float = 1.0):
         self.logger = logging.getLogger(__name__)
+        self.concurrency = max(1, concurrency)
+        self.spool_dir = spool_dir
+        self.llm_max_chars = llm_max_chars
+        self.heartbeat_interval = heartbeat_interval
+        # A PROCESSING batch whose heartbeat is older than this is treated as interrupted
+        self.batch_lease_seconds = batch_lease_seconds
+        self.partial_commit_interval = partial_commit_interval
+        self.classification_service = ClassificationService()
     
-    async def process_batch(self, file_data: List[Tuple[str, bytes]], batch_name: str = None) -> str:
+    def create_batch(self, file_data: List[Tuple[str, bytes]], batch_name: str = None) -> str:
         batch_id = str(uuid.uuid4())
+        batch_dir = os.path.join(self.spool_dir, batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
         
         db = SessionLocal()
         try:
+            for index, (filename, content) in enumerate(file_data):
+                spool_name = f"{index:05d}_{os.path.basename(filename)}"
+                with open(os.path.join(batch_dir, spool_name), 'wb') as f:
+                    f.write(content)
+            
             batch = ProcessingBatch(
                 batch_id=batch_id,
                 batch_name=batch_name or f"Batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -31,54 +83,142 @@ class ResumeProcessor:
             )
             db.add(batch)
             db.commit()
-            
-            await self._process_files_async(batch_id, file_data) 
             return batch_id
             
         except Exception as e:
             self.logger.error(f"Error creating batch: {str(e)}")
             db.rollback()
+            shutil.rmtree(batch_dir, ignore_errors=True)
             raise
         finally:
             db.close()
     
-    async def _process_files_async(self, batch_id: str, file_data: List[Tuple[str, bytes]]):
+    def enqueue_batch(self, batch_id: str):
+        try:
+            process_batch_task.delay(batch_id)
+        except Exception as e:
+            # Nothing will ever pick the batch up, so it must not sit in PENDING with its files spooled
+            self.logger.error(f"Error queueing batch {batch_id}: {str(e)}")
+            db = SessionLocal()
+            try:
+                db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).update({
+                    ProcessingBatch.status: BatchStatus.FAILED,
+                    ProcessingBatch.completed_at: datetime.now()
+                }, synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+            shutil.rmtree(os.path.join(self.spool_dir, batch_id), ignore_errors=True)
+            raise
+        self.logger.info(f"Queued batch {batch_id} for processing")
+    
+    def load_spooled_files(self, batch_id: str) -> List[Tuple[str, bytes]]:
+        batch_dir = os.path.join(self.spool_dir, batch_id)
+        file_data = []
+        for spool_name in sorted(os.listdir(batch_dir)):
+            with open(os.path.join(batch_dir, spool_name), 'rb') as f:
+                file_data.append((spool_name.split('_', 1)[1], f.read()))
+        return file_data
+    
+    def run_spooled_batch(self, batch_id: str):
+        if not os.path.isdir(os.path.join(self.spool_dir, batch_id)):
+            # Redelivered after the batch already finished and cleaned up
+            self.logger.info(f"Batch {batch_id} has no spooled files left, skipping")
+            return
+        file_data = self.load_spooled_files(batch_id)
+        asyncio.run(self._process_files_async(batch_id, file_data))
+        shutil.rmtree(os.path.join(self.spool_dir, batch_id), ignore_errors=True)
+    
+    def _claim_batch(self, db: Session, batch_id: str, run_id: str) -> bool:
+        """Take ownership of the batch for this run; False when it already completed.
+        
+        Raises BatchInProgress when another run still holds it, so a redelivery never resets a live batch.
+        """
+        # The row lock makes the check and the claim atomic between concurrent deliveries
+        batch = db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).with_for_update().first()
+        now = datetime.now()
+        if batch.status == BatchStatus.COMPLETED:
+            db.commit()
+            return False
+        if (batch.status == BatchStatus.PROCESSING and batch.heartbeat_at is not None
+                and now - batch.heartbeat_at < timedelta(seconds=self.batch_lease_seconds)):
+            db.commit()
+            raise BatchInProgress(batch_id)
+        batch.status = BatchStatus.PROCESSING
+        batch.run_id = run_id
+        batch.heartbeat_at = now
+        batch.started_at = batch.started_at or now
+        db.commit()
+        return True
+    
+    def _touch_batch(self, batch_id: str, run_id: str):
         db = SessionLocal()
         try:
-            batch = db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).first()
-            batch.status = BatchStatus.PROCESSING
-            batch.started_at = datetime.now()
+            owned = db.query(ProcessingBatch).filter(
+                ProcessingBatch.batch_id == batch_id,
+                ProcessingBatch.run_id == run_id
+            ).update({ProcessingBatch.heartbeat_at: datetime.now()}, synchronize_session=False)
             db.commit()
+            if not owned:
+                self.logger.warning(f"Batch {batch_id} was taken over by another run")
+        finally:
+            db.close()
+    
+    async def _heartbeat(self, batch_id: str, run_id: str):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(self._touch_batch, batch_id, run_id)
+            except Exception as e:
+                self.logger.error(f"Heartbeat failed for batch {batch_id}: {str(e)}")
+    
+    async def _process_files_async(self, batch_id: str, file_data: List[Tuple[str, bytes]]):
+        run_id = str(uuid.uuid4())
+        db = SessionLocal()
+        heartbeat = None
+        try:
+            if not self._claim_batch(db, batch_id, run_id):
+                return
+            heartbeat = asyncio.create_task(self._heartbeat(batch_id, run_id))
             
-            successful_count = 0
-            failed_count = 0
+            # A redelivered task (worker lost mid-batch) resumes: files that already reached a final
+            # status are skipped, and the ones interrupted mid-processing start over
+            db.query(ProcessingLog).filter(
+                ProcessingLog.batch_id == batch_id,
+                ProcessingLog.processing_status == ProcessingStatus.PROCESSING
+            ).delete(synchronize_session=False)
+            db.commit()
+            finished = Counter(db.query(ProcessingLog.filename, ProcessingLog.file_hash).filter(
+                ProcessingLog.batch_id == batch_id
+            ).all())
+            self._sync_counters(db, batch_id)
             
+            queue: asyncio.Queue = asyncio.Queue()
             for filename, content in file_data:
-                try:
-                    success = await self._process_single_file(db, batch_id, filename, content)
-                    if success:
-                        successful_count += 1
-                    else:
-                        failed_count += 1
-                        
-                    batch.processed_files += 1
-                    batch.successful_files = successful_count
-                    batch.failed_files = failed_count
-                    db.commit()
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing file {filename}: {str(e)}")
-                    db.rollback()
-                    failed_count += 1
-                    batch = db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).first()
-                    batch.processed_files += 1
-                    batch.failed_files = failed_count
-                    db.commit()
+                file_hash = hashlib.sha256(content).hexdigest()
+                if finished[(filename, file_hash)]:
+                    finished[(filename, file_hash)] -= 1
+                    continue
+                queue.put_nowait((filename, content, file_hash))
+            
+            in_flight: Dict[str, asyncio.Event] = {}
+            worker_count = max(1, min(self.concurrency, queue.qsize()))
+            self.logger.info(f"Processing batch {batch_id} with {worker_count} worker(s)")
+            await asyncio.gather(*(self._file_worker(batch_id, queue, in_flight) for _ in range(worker_count)))
+            self._sync_counters(db, batch_id)
             
+            batch = db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).first()
             batch.status = BatchStatus.COMPLETED
             batch.completed_at = datetime.now()
             db.commit()
             
+            try:
+                await asyncio.to_thread(semantic_search.sync, db)
+            except Exception as e:
+                self.logger.error(f"Semantic index sync failed after batch {batch_id}: {str(e)}")
+            
+        except BatchInProgress:
+            raise
         except Exception as e:
             self.logger.error(f"Batch processing error: {str(e)}")
             db.rollback()  
@@ -86,23 +226,100 @@ class ResumeProcessor:
             batch.status = BatchStatus.FAILED
             db.commit()
         finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
             db.close()
     
-    async def _process_single_file(self, db: Session, batch_id: str, filename: str, file_content: bytes) -> bool:
+    async def _file_worker(self, batch_id: str, queue: asyncio.Queue, in_flight: Dict[str, asyncio.Event]):
+        # Each worker owns its session so concurrent files never share ORM state
+        db = SessionLocal()
+        try:
+            while True:
+                try:
+                    filename, content, file_hash = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                # A copy of the same file being processed by another worker: wait for it,
+                # then the dedup lookup below reuses its result. Several copies may be waiting,
+                # so each re-checks after waking and only one claims the next turn.
+                while file_hash in in_flight:
+                    await in_flight[file_hash].wait()
+                done = in_flight[file_hash] = asyncio.Event()
+                
+                try:
+                    success = await self._process_single_file(db, batch_id, filename, content, file_hash)
+                except Exception as e:
+                    self.logger.error(f"Error processing file {filename}: {str(e)}")
+                    db.rollback()
+                    success = False
+                finally:
+                    del in_flight[file_hash]
+                    done.set()
+                
+                self._record_file_result(db, batch_id, success)
+        finally:
+            db.close()
+    
+    def _sync_counters(self, db: Session, batch_id: str):
+        """Reset the batch counters from its processing logs, the source of truth after a redelivery."""
+        counts = dict(db.query(ProcessingLog.processing_status, func.count(ProcessingLog.id)).filter(
+            ProcessingLog.batch_id == batch_id
+        ).group_by(ProcessingLog.processing_status).all())
+        successful = counts.get(ProcessingStatus.SUCCESS, 0)
+        failed = counts.get(ProcessingStatus.FAILED, 0)
+        db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).update({
+            ProcessingBatch.processed_files: successful + failed,
+            ProcessingBatch.successful_files: successful,
+            ProcessingBatch.failed_files: failed
+        }, synchronize_session=False)
+        db.commit()
+    
+    def _record_file_result(self, db: Session, batch_id: str, success: bool):
+        # Increment in SQL rather than in Python so concurrent workers cannot lose updates
+        counter = ProcessingBatch.successful_files if success else ProcessingBatch.failed_files
+        try:
+            db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).update({
+                ProcessingBatch.processed_files: ProcessingBatch.processed_files + 1,
+                counter: counter + 1
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            self.logger.error(f"Error updating counters for batch {batch_id}: {str(e)}")
+            db.rollback()
+    
+    async def _process_single_file(self, db: Session, batch_id: str, filename: str, file_content: bytes,
+                                   file_hash: str = None) -> bool:
         start_time = datetime.now()
+        file_hash = file_hash or hashlib.sha256(file_content).hexdigest()
         
         try:
             log = ProcessingLog(
                 batch_id=batch_id,
                 filename=filename,
                 file_size=len(file_content),
+                file_hash=file_hash,
                 processing_status=ProcessingStatus.PROCESSING
             )
             db.add(log)
             db.commit()
             
-            self.logger.info(f"Uploading {filename} to S3")
-            s3_result = s3_service.upload_file(file_content, filename)
+            if self._reuse_previous_result(db, log, file_hash):
+                self.logger.info(f"{filename} was already processed, reusing previous result")
+                log.processing_time_seconds = (datetime.now() - start_time).total_seconds()
+                db.commit()
+                return True
+            
+            # The key is chosen up front so extraction can run while the upload is still in flight
+            s3_key = s3_service.make_key(filename)
+            self.logger.info(f"Uploading {filename} to S3 and extracting text")
+            upload = s3_service.upload_file_async(file_content, filename, s3_key=s3_key)
+            extract = lambda: asyncio.to_thread(file_processor.extract_text_from_file, file_content, filename, s3_key)
+            if file_processor.needs_s3_object(filename):
+                s3_result = await upload
+                extraction_result = await extract() if s3_result['success'] else None
+            else:
+                s3_result, extraction_result = await asyncio.gather(upload, extract())
             if not s3_result['success']:
                 self.logger.error(f"S3 upload failed for {filename}: {s3_result.get('error')}")
                 log.processing_status = ProcessingStatus.FAILED
@@ -112,10 +329,8 @@ class ResumeProcessor:
             log.s3_key = s3_result['s3_key']
             self.logger.info(f"Uploaded {filename} to S3 with key: {s3_result['s3_key']}")
             
-            self.logger.info(f"Extracting text from {filename}")
-            extraction_result = file_processor.extract_text_from_file(
-                file_content, filename, s3_result['s3_key']
-            )
+            if extraction_result['success'] and extraction_result.get('needs_ocr'):
+                extraction_result = await self._run_remote_ocr(filename, file_content, s3_result['s3_key'], extraction_result)
             if not extraction_result['success']:
                 self.logger.error(f"Text extraction failed for {filename}: {extraction_result.get('error')}")
                 log.processing_status = ProcessingStatus.FAILED
@@ -126,7 +341,23 @@ class ResumeProcessor:
             
             self.logger.info(f"Calling Ollama for {filename}")
             llm_start_time = datetime.now()
-            llm_result = ollama_service.extract_resume_info(extraction_result['text'])
+            
+            last_partial_commit = None
+            
+            def record_partial(partial: Dict[str, Any]):
+                # Runs on the event loop for every streamed field, so the blocking commit is throttled;
+                # the final result overwrites the partial one anyway
+                nonlocal last_partial_commit
+                now = datetime.now()
+                if last_partial_commit and (now - last_partial_commit).total_seconds() < self.partial_commit_interval:
+                    return
+                last_partial_commit = now
+                log.meta_data = {'partial_result': partial}
+                db.commit()
+            
+            # Only the prompt is budgeted; the full text is still stored for search
+            llm_input = extraction_result['text'][:self.llm_max_chars]
+            llm_result = await ollama_service.extract_resume_info_async(llm_input, record_partial)
             llm_processing_time = (datetime.now() - llm_start_time).total_seconds()
             
             if not llm_result.success:
@@ -135,6 +366,7 @@ class ResumeProcessor:
                 log.processing_status = ProcessingStatus.FAILED
                 log.error_message = f"LLM processing failed: {llm_result.error_message}"
                 log.llm_response_time = llm_processing_time
+                log.meta_data = {'llm_metrics': llm_result.metrics}
                 db.commit()
                 return False
             self.logger.info(f"Ollama processing completed for {filename}")
@@ -155,21 +387,29 @@ class ResumeProcessor:
                 meta_data={
                     'file_size': len(file_content),
                     'processing_time': llm_result.processing_time,
-                    'extraction_method': extraction_result['extraction_method']
+                    'extraction_method': extraction_result['extraction_method'],
+                    'llm_cache_hit': llm_result.cache_hit,
+                    'page_count': extraction_result.get('page_count', 1),
+                    'pages_extracted': extraction_result.get('pages_extracted', extraction_result.get('page_count', 1)),
+                    'truncated': extraction_result.get('truncated', False),
+                    'llm_input_truncated': len(llm_input) < len(extraction_result['text']),
+                    'extraction_backend': extraction_result.get('extraction_backend'),
+                    'backend_attempts': extraction_result.get('backend_attempts'),
+                    'pdf_profile': extraction_result.get('pdf_profile')
                 }
             )
             db.add(extracted_text)
             
-            classification_service = ClassificationService()
-            classification_result = classification_service.classify_candidate(candidate, db)
-            candidate.classification = classification_result['classification']
-            candidate.overall_score = classification_result['overall_score']
-            candidate.experience_level = classification_result['experience_level']
             log.candidate_id = candidate.id
             log.processing_status = ProcessingStatus.SUCCESS
             log.extraction_confidence = llm_result.confidence
             log.llm_response_time = llm_processing_time
             log.processing_time_seconds = (datetime.now() - start_time).total_seconds()
+            log.meta_data = {
+                'llm_cache_hit': llm_result.cache_hit,
+                'llm_cache': extraction_cache.stats(),
+                'llm_metrics': llm_result.metrics
+            }
             
             db.commit()
             return True
@@ -183,105 +423,173 @@ class ResumeProcessor:
             db.commit()
             return False
     
+    async def _run_remote_ocr(self, filename: str, file_content: bytes, s3_key: str,
+                              extraction_result: Dict[str, Any]) -> Dict[str, Any]:
+        self.logger.info(f"Submitting {filename} to Textract")
+        textract_result = await textract_service.extract(s3_key)
+        if textract_result['success'] and textract_result['text']:
+            return {**extraction_result, **textract_result, 'needs_ocr': False}
+        
+        self.logger.warning(f"Textract failed for {filename}, falling back to local OCR: {textract_result.get('error')}")
+        return await asyncio.to_thread(file_processor.extract_text_from_file, file_content, filename, s3_key, True)
+    
+    def _reuse_previous_result(self, db: Session, log: ProcessingLog, file_hash: str) -> bool:
+        previous = db.query(ProcessingLog).join(
+            Candidate, ProcessingLog.candidate_id == Candidate.id
+        ).filter(
+            ProcessingLog.file_hash == file_hash,
+            ProcessingLog.processing_status == ProcessingStatus.SUCCESS,
+            ProcessingLog.id != log.id
+        ).order_by(ProcessingLog.id.desc()).first()
+        
+        if not previous:
+            return False
+        
+        log.s3_key = previous.s3_key
+        log.candidate_id = previous.candidate_id
+        log.extraction_confidence = previous.extraction_confidence
+        log.processing_status = ProcessingStatus.SUCCESS
+        log.meta_data = {'duplicate_of_log_id': previous.id}
+        return True
+    
     def _create_candidate_from_data(self, db: Session, data: Dict[str, Any], filename: str, s3_key: str) -> Candidate:
-        personal_info = data.get('personal_info', {})
-
-        email = personal_info.get('email')
-        candidate = None
-        if email:
-            candidate = db.query(Candidate).filter(Candidate.email == email).first()
-
-        if candidate:
-            print("Updating existing candidate")
-            candidate.full_name = personal_info.get('full_name', candidate.full_name)
-            candidate.phone = personal_info.get('phone', candidate.phone)
-            candidate.address = personal_info.get('address', candidate.address)
-            candidate.original_filename = filename
-            candidate.s3_file_key = s3_key
-            db.query(Education).filter(Education.candidate_id == candidate.id).delete()
-            db.query(Experience).filter(Experience.candidate_id == candidate.id).delete()
-            db.query(Skill).filter(Skill.candidate_id == candidate.id).delete()
-            db.query(Project).filter(Project.candidate_id == candidate.id).delete()
-            db.query(Certification).filter(Certification.candidate_id == candidate.id).delete()
-        else:
-            print("Creating new candidate")
-            candidate = Candidate(
-                full_name=personal_info.get('full_name', ''),
-                email=email,
-                phone=personal_info.get('phone'),
-                address=personal_info.get('address'),
-                original_filename=filename,
-                s3_file_key=s3_key
-            )
-            db.add(candidate)
+        try:
+            # Savepoint, so losing a race on candidates.email only undoes the candidate write
+            with db.begin_nested():
+                return self._create_candidates_from_data(db, [(data, filename, s3_key)])[0]
+        except IntegrityError:
+            # Another worker inserted the same email after the lookup; the retry finds it and updates it
+            self.logger.info(f"Candidate for {filename} was created concurrently, retrying as an update")
+            with db.begin_nested():
+                return self._create_candidates_from_data(db, [(data, filename, s3_key)])[0]
+    
+    def _create_candidates_from_data(self, db: Session, items: List[Tuple[Dict[str, Any], str, str]]) -> List[Candidate]:
+        """Write candidates and their sub-entities with one executemany per table.
+        
+        Nothing is committed here; the caller's commit makes each batch a single transaction.
+        """
+        # The unique index on email is case-insensitive under MySQL's default collation, so match the same way
+        emails = [(item[0].get('personal_info', {}).get('email') or '').strip().lower() or None for item in items]
+        existing = {}
+        if any(emails):
+            # A locking read sees rows committed by concurrent workers, which a plain repeatable-read
+            # snapshot may not, and keeps two CVs from rewriting one candidate's rows at the same time
+            existing = {
+                candidate.email.lower(): candidate
+                for candidate in db.query(Candidate).filter(
+                    Candidate.email.in_([e for e in emails if e])
+                ).with_for_update().all()
+            }
+        
+        candidates = []
+        replaced_ids = []
+        for (data, filename, s3_key), email in zip(items, emails):
+            personal_info = data.get('personal_info', {})
+            candidate = existing.get(email) if email else None
+            if candidate:
+                self.logger.info(f"Updating existing candidate {candidate.id} from {filename}")
+                candidate.full_name = personal_info.get('full_name', candidate.full_name)
+                candidate.phone = personal_info.get('phone', candidate.phone)
+                candidate.address = personal_info.get('address', candidate.address)
+                candidate.original_filename = filename
+                candidate.s3_file_key = s3_key
+                if candidate.id is not None:
+                    replaced_ids.append(candidate.id)
+            else:
+                candidate = Candidate(
+                    full_name=personal_info.get('full_name', ''),
+                    email=email,
+                    phone=personal_info.get('phone'),
+                    address=personal_info.get('address'),
+                    original_filename=filename,
+                    s3_file_key=s3_key
+                )
+                db.add(candidate)
+                if email:
+                    existing[email] = candidate
+            candidates.append(candidate)
+        
+        if replaced_ids:
+            for model in (Education, Experience, Skill, Project, Certification):
+                db.query(model).filter(model.candidate_id.in_(replaced_ids)).delete(synchronize_session=False)
         db.flush()
-        print(f"Candidate ID after flush: {candidate.id}")  
         
-        for edu_data in data.get('education', []):
-            graduation_year = self._extract_year(edu_data.get('graduation_year'))
-            education = Education(
-                candidate_id=candidate.id,
-                degree=edu_data.get('degree'),
-                institution=edu_data.get('institution'),
-                graduation_year=graduation_year,
-                gpa=edu_data.get('gpa'),
-                major=edu_data.get('major'),
-                education_level=self._map_education_level(edu_data.get('education_level'))
-            )
-            db.add(education)
-        print(f"Added education: {edu_data.get('degree')} for candidate ID: {candidate.id}")
+        # The same email twice in one group keeps only the last CV's sub-entities
+        rows_by_candidate = {}
+        for candidate, (data, _, _) in zip(candidates, items):
+            rows_by_candidate[candidate.id] = self._build_child_rows(candidate.id, data)
         
-        for exp_data in data.get('experience', []):
-            experience = Experience(
-                candidate_id=candidate.id,
-                job_title=exp_data.get('job_title'),
-                company=exp_data.get('company'),
-                start_date=self._parse_date(exp_data.get('start_date')),
-                end_date=self._parse_date(exp_data.get('end_date')),
-                is_current=exp_data.get('is_current', False),
-                responsibilities=exp_data.get('responsibilities', []),
-                achievements=exp_data.get('achievements', [])
+        # Scored from the rows about to be inserted, so classification never reads them back
+        for candidate in candidates:
+            child_rows = rows_by_candidate[candidate.id]
+            classification_result = self.classification_service.score(
+                child_rows[Experience], child_rows[Education], child_rows[Skill]
             )
-            db.add(experience)
-        print(f"Added experience: {exp_data.get('job_title')} at {exp_data.get('company')} for candidate ID: {candidate.id}")
+            candidate.classification = classification_result['classification']
+            candidate.overall_score = classification_result['overall_score']
+            candidate.experience_level = classification_result['experience_level']
         
-        for skill_data in data.get('skills', []):
-            skill = Skill(
-                candidate_id=candidate.id,
-                skill_name=skill_data.get('skill_name'),
-                skill_category=self._map_skill_category(skill_data.get('category')),
-                proficiency_level=self._map_proficiency_level(skill_data.get('proficiency_level')),
-                years_experience=skill_data.get('years_experience', 0)
-            )
-            db.add(skill)
-        print(f"Added skill: {skill_data.get('skill_name')} for candidate ID: {candidate.id}")
+        for model in (Education, Experience, Skill, Project, Certification):
+            rows = [row for child_rows in rows_by_candidate.values() for row in child_rows[model]]
+            if rows:
+                db.execute(insert(model), rows)
         
-        for project_data in data.get('projects', []):
-            project = Project(
-                candidate_id=candidate.id,
-                project_name=project_data.get('project_name'),
-                description=project_data.get('description'),
-                technologies=project_data.get('technologies', []),
-                project_url=project_data.get('project_url'),
-                github_url=project_data.get('github_url'),
-                start_date=self._parse_date(project_data.get('start_date')),
-                end_date=self._parse_date(project_data.get('end_date'))
-            )
-            db.add(project)
-        print(f"Added project: {project_data.get('project_name')} for candidate ID: {candidate.id}")
+        match_score_store.refresh_candidates(db, {
+            candidate_id: matching_service.candidate_profile(child_rows[Skill], child_rows[Experience], child_rows[Education])
+            for candidate_id, child_rows in rows_by_candidate.items()
+        })
         
-        for cert_data in data.get('certifications', []):
-            certification = Certification(
-                candidate_id=candidate.id,
-                certification_name=cert_data.get('certification_name'),
-                issuing_organization=cert_data.get('issuing_organization'),
-                issue_date=self._parse_date(cert_data.get('issue_date')),
-                expiry_date=self._parse_date(cert_data.get('expiry_date'))
-            )
-            db.add(certification)
-        print(f"Added certification: {cert_data.get('certification_name')} for candidate ID: {candidate.id}")
-        db.commit() 
-        return candidate
+        return candidates
+    
+    def _build_child_rows(self, candidate_id: int, data: Dict[str, Any]) -> Dict[Any, List[Dict[str, Any]]]:
+        return {
+            Education: [{
+                'candidate_id': candidate_id,
+                'degree': edu_data.get('degree'),
+                'institution': edu_data.get('institution'),
+                'graduation_year': self._extract_year(edu_data.get('graduation_year')),
+                'gpa': edu_data.get('gpa'),
+                'major': edu_data.get('major'),
+                'education_level': self._map_education_level(edu_data.get('education_level')),
+                'is_primary': False
+            } for edu_data in data.get('education', [])],
+            Experience: [{
+                'candidate_id': candidate_id,
+                'job_title': exp_data.get('job_title'),
+                'company': exp_data.get('company'),
+                'start_date': self._parse_date(exp_data.get('start_date')),
+                'end_date': self._parse_date(exp_data.get('end_date')),
+                'is_current': exp_data.get('is_current', False),
+                'responsibilities': exp_data.get('responsibilities', []),
+                'achievements': exp_data.get('achievements', [])
+            } for exp_data in data.get('experience', [])],
+            Skill: [{
+                'candidate_id': candidate_id,
+                'skill_name': skill_data.get('skill_name'),
+                'skill_category': self._map_skill_category(skill_data.get('category')),
+                'proficiency_level': self._map_proficiency_level(skill_data.get('proficiency_level')),
+                'years_experience': skill_data.get('years_experience', 0),
+                'is_verified': False
+            } for skill_data in data.get('skills', [])],
+            Project: [{
+                'candidate_id': candidate_id,
+                'project_name': project_data.get('project_name'),
+                'description': project_data.get('description'),
+                'technologies': project_data.get('technologies', []),
+                'project_url': project_data.get('project_url'),
+                'github_url': project_data.get('github_url'),
+                'start_date': self._parse_date(project_data.get('start_date')),
+                'end_date': self._parse_date(project_data.get('end_date'))
+            } for project_data in data.get('projects', [])],
+            Certification: [{
+                'candidate_id': candidate_id,
+                'certification_name': cert_data.get('certification_name'),
+                'issuing_organization': cert_data.get('issuing_organization'),
+                'issue_date': self._parse_date(cert_data.get('issue_date')),
+                'expiry_date': self._parse_date(cert_data.get('expiry_date')),
+                'is_active': True
+            } for cert_data in data.get('certifications', [])]
+        }
     
     def _parse_date(self, date_str: str):
         if not date_str:
@@ -357,4 +665,30 @@ class ResumeProcessor:
         
         return level_mapping.get(level_str.lower(), ProficiencyLevel.INTERMEDIATE)
 
-resume_processor = ResumeProcessor()
\ No newline at end of file
+RESUME_PROCESSOR_CONFIG = {
+    'concurrency': int(os.getenv('PROCESSING_CONCURRENCY', 4)),
+    'spool_dir': os.getenv('UPLOAD_SPOOL_DIR', 'uploads'),
+    'llm_max_chars': int(os.getenv('EXTRACTION_MAX_CHARS', 20000)),
+    'heartbeat_interval': int(os.getenv('BATCH_HEARTBEAT_INTERVAL', 30)),
+    'batch_lease_seconds': int(os.getenv('BATCH_LEASE_SECONDS', 300)),
+    'partial_commit_interval': float(os.getenv('PARTIAL_RESULT_COMMIT_INTERVAL', 1.0))
+}
+
+resume_processor = ResumeProcessor(**RESUME_PROCESSOR_CONFIG)
+
+@celery_app.task(name='resume_processor.process_batch', bind=True, max_retries=None)
+def process_batch_task(self, batch_id: str):
+    try:
+        resume_processor.run_spooled_batch(batch_id)
+    except BatchInProgress:
+        # Another worker is still running it; check back once its lease could have lapsed, so the
+        # batch is resumed if that worker dies after this delivery was acknowledged
+        raise self.retry(countdown=resume_processor.batch_lease_seconds)
+
+@celery_app.task(name='resume_processor.sync_semantic_index')
+def sync_semantic_index_task():
+    db = SessionLocal()
+    try:
+        return semantic_search.sync(db)
+    finally:
+        db.close()
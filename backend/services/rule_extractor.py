@@ -0,0 +1,351 @@
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+SECTION_ALIASES = {
+    'education': ['education', 'academic background', 'academic qualifications', 'qualifications', 'học vấn', 'trình độ học vấn'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment history', 'work history',
+                   'career history', 'kinh nghiệm', 'kinh nghiệm làm việc'],
+    'skills': ['skills', 'technical skills', 'core skills', 'skills & tools', 'skills and tools', 'competencies', 'kỹ năng'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects', 'dự án'],
+    'certifications': ['certifications', 'certificates', 'licenses & certifications', 'awards & certifications', 'chứng chỉ'],
+    'languages': ['languages', 'language skills', 'ngoại ngữ'],
+    'summary': ['summary', 'profile', 'objective', 'career objective', 'about me', 'mục tiêu nghề nghiệp']
+}
+
+SKILL_DICTIONARY = {
+    'Technical': ['python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'kotlin', 'swift', 'scala',
+                  'rust', 'golang', 'sql', 'html', 'css', 'machine learning', 'deep learning', 'data analysis',
+                  'computer vision', 'nlp', 'rest api', 'graphql', 'microservices'],
+    'Framework': ['react', 'angular', 'vue', 'next.js', 'node.js', 'express', 'django', 'flask', 'fastapi', 'spring',
+                  'spring boot', '.net', 'laravel', 'tensorflow', 'pytorch', 'scikit-learn', 'pandas', 'numpy',
+                  'tailwind', 'bootstrap', 'flutter', 'react native'],
+    'Tool': ['git', 'docker', 'kubernetes', 'jenkins', 'aws', 'azure', 'gcp', 'linux', 'mysql', 'postgresql',
+             'mongodb', 'redis', 'elasticsearch', 'kafka', 'rabbitmq', 'jira', 'figma', 'postman', 'terraform',
+             'celery', 'excel', 'power bi', 'tableau'],
+    'Soft': ['communication', 'teamwork', 'leadership', 'problem solving', 'time management', 'critical thinking',
+             'presentation', 'negotiation']
+}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+DEGREE_LEVELS = [
+    ('PhD', ['phd', 'ph.d', 'doctor', 'doctorate', 'tiến sĩ']),
+    ('Master', ['master', 'm.sc', 'msc', 'mba', 'm.eng', 'thạc sĩ']),
+    ('Bachelor', ['bachelor', 'b.sc', 'bsc', 'b.eng', 'b.a', 'engineer degree', 'cử nhân', 'kỹ sư']),
+    ('Associate', ['associate', 'college diploma', 'cao đẳng']),
+    ('High School', ['high school', 'trung học'])
+]
+
+INSTITUTION_KEYWORDS = ['university', 'college', 'institute', 'academy', 'school', 'đại học', 'học viện']
+
+DATE_TOKEN = r'(?:[A-Za-z]{3,9}\.?\s+\d{4}|\d{1,2}[/.-]\d{4}|\d{4}[/.-]\d{1,2}|\d{4})'
+PRESENT_TOKEN = r'(?:present|current|now|today|hiện tại|nay)'
+DATE_RANGE_PATTERN = re.compile(
+    rf'({DATE_TOKEN})\s*(?:-|–|—|to|until|đến)\s*({DATE_TOKEN}|{PRESENT_TOKEN})', re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d{2})\b')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(\+?\d[\d\s().-]{7,}\d)')
+LINKEDIN_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?linkedin\.com/in/[\w-]+/?', re.IGNORECASE)
+GITHUB_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?github\.com/[\w-]+(?:/[\w.-]+)?/?', re.IGNORECASE)
+GPA_PATTERN = re.compile(r'(?:gpa|cgpa|điểm trung bình)\s*[:\-]?\s*(\d(?:[.,]\d{1,2})?)', re.IGNORECASE)
+BULLET_PATTERN = re.compile(r'^\s*[-•*●▪◦·]\s*')
+
+class RuleBasedExtractor:
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._header_lookup = {
+            alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases
+        }
+        self._skill_patterns = [
+            (skill, category, re.compile(rf'(?<![\w+#.]){re.escape(skill)}(?![\w+#])', re.IGNORECASE))
+            for category, skills in SKILL_DICTIONARY.items() for skill in skills
+        ]
+        self._skill_categories = {
+            skill: category for category, skills in SKILL_DICTIONARY.items() for skill in skills
+        }
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        lines = [line.strip() for line in text.splitlines()]
+        header_lines, sections = self._split_sections(lines)
+
+        return {
+            "personal_info": self._extract_personal_info(text, header_lines),
+            "education": self._extract_education(sections.get('education', [])),
+            "experience": self._extract_experience(sections.get('experience', [])),
+            "skills": self._extract_skills(sections.get('skills', [])),
+            "projects": self._extract_projects(sections.get('projects', [])),
+            "certifications": self._extract_certifications(sections.get('certifications', [])),
+            "languages": self._extract_languages(sections.get('languages', []))
+        }
+
+    def split_text_sections(self, text: str) -> Dict[str, str]:
+        header_lines, sections = self._split_sections([line.strip() for line in text.splitlines()])
+        result = {'personal_info': '\n'.join(header_lines + sections.pop('summary', []))}
+        for section, lines in sections.items():
+            result[section] = '\n'.join(lines)
+        return result
+
+    def extract_personal_info(self, text: str) -> Dict[str, Any]:
+        header_lines, _ = self._split_sections([line.strip() for line in text.splitlines()])
+        return self._extract_personal_info(text, header_lines)
+
+    def _detect_header(self, line: str) -> Optional[str]:
+        normalized = line.lower().strip(' :#*-_|').strip()
+        if not normalized or len(normalized) > 40:
+            return None
+        return self._header_lookup.get(normalized)
+
+    def _split_sections(self, lines: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        header_lines = []
+        sections: Dict[str, List[str]] = {}
+        current = None
+        for line in lines:
+            section = self._detect_header(line)
+            if section:
+                current = section
+                sections.setdefault(section, [])
+                continue
+            if not line:
+                continue
+            if current is None:
+                header_lines.append(line)
+            else:
+                sections[current].append(line)
+        return header_lines, sections
+
+    def _extract_personal_info(self, text: str, header_lines: List[str]) -> Dict[str, Any]:
+        info: Dict[str, Any] = {}
+
+        email = EMAIL_PATTERN.search(text)
+        if email:
+            info['email'] = email.group(0)
+
+        for match in PHONE_PATTERN.finditer(text):
+            digits = re.sub(r'\D', '', match.group(1))
+            if 9 <= len(digits) <= 15 and not DATE_RANGE_PATTERN.search(match.group(1)):
+                info['phone'] = match.group(1).strip()
+                break
+
+        linkedin = LINKEDIN_PATTERN.search(text)
+        if linkedin:
+            info['linkedin'] = linkedin.group(0)
+        github = GITHUB_PATTERN.search(text)
+        if github:
+            info['github'] = github.group(0)
+
+        for line in header_lines[:5]:
+            words = line.split()
+            if 2 <= len(words) <= 5 and not re.search(r'[\d@/:|]', line):
+                info['full_name'] = line.title() if line.isupper() else line
+                break
+
+        return info
+
+    def parse_date_range(self, text: str) -> Optional[Tuple[Optional[str], Optional[str], bool]]:
+        match = DATE_RANGE_PATTERN.search(text)
+        if not match:
+            return None
+        start = self._normalize_date(match.group(1))
+        is_current = bool(re.fullmatch(PRESENT_TOKEN, match.group(2).strip(), re.IGNORECASE))
+        end = None if is_current else self._normalize_date(match.group(2))
+        return start, end, is_current
+
+    def _normalize_date(self, token: str) -> Optional[str]:
+        token = token.strip().rstrip('.')
+
+        match = re.fullmatch(r'([A-Za-z]{3,9})\.?\s+(\d{4})', token)
+        if match:
+            month = MONTHS.get(match.group(1).lower()[:4]) or MONTHS.get(match.group(1).lower()[:3])
+            return f"{match.group(2)}-{month:02d}" if month else match.group(2)
+
+        match = re.fullmatch(r'(\d{1,2})[/.-](\d{4})', token)
+        if match and 1 <= int(match.group(1)) <= 12:
+            return f"{match.group(2)}-{int(match.group(1)):02d}"
+
+        match = re.fullmatch(r'(\d{4})[/.-](\d{1,2})', token)
+        if match and 1 <= int(match.group(2)) <= 12:
+            return f"{match.group(1)}-{int(match.group(2)):02d}"
+
+        match = YEAR_PATTERN.search(token)
+        return match.group(1) if match else None
+
+    def _split_title_company(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+        line = line.strip(' -–—|,')
+        for separator in [' at ', ' @ ', ' | ', ' - ', ' – ', ' — ', ', ']:
+            if separator in line:
+                title, company = line.split(separator, 1)
+                return title.strip() or None, company.strip(' -–—|,') or None
+        return line or None, None
+
+    def _extract_experience(self, lines: List[str]) -> List[Dict[str, Any]]:
+        entries = []
+        pending_header = None
+        current = None
+
+        for line in lines:
+            date_range = self.parse_date_range(line)
+            if date_range:
+                remainder = DATE_RANGE_PATTERN.sub('', line).strip(' -–—|,()')
+                title, company = self._split_title_company(pending_header or remainder)
+                if pending_header and remainder and not company:
+                    company = remainder
+                current = {
+                    "job_title": title,
+                    "company": company,
+                    "start_date": date_range[0],
+                    "end_date": date_range[1],
+                    "is_current": date_range[2],
+                    "responsibilities": [],
+                    "achievements": []
+                }
+                entries.append(current)
+                pending_header = None
+            elif BULLET_PATTERN.match(line):
+                if current is not None:
+                    current["responsibilities"].append(BULLET_PATTERN.sub('', line))
+            else:
+                pending_header = line
+
+        return entries
+
+    def _detect_degree_level(self, text: str) -> Optional[str]:
+        lowered = text.lower()
+        for level, keywords in DEGREE_LEVELS:
+            if any(keyword in lowered for keyword in keywords):
+                return level
+        return None
+
+    def _extract_education(self, lines: List[str]) -> List[Dict[str, Any]]:
+        entries = []
+        current = None
+
+        for line in lines:
+            lowered = line.lower()
+            level = self._detect_degree_level(line)
+            is_institution = any(keyword in lowered for keyword in INSTITUTION_KEYWORDS)
+
+            if is_institution and (current is None or current.get('institution')):
+                current = {"degree": None, "institution": None, "graduation_year": None,
+                           "gpa": None, "major": None, "education_level": None}
+                entries.append(current)
+            elif current is None and level:
+                current = {"degree": None, "institution": None, "graduation_year": None,
+                           "gpa": None, "major": None, "education_level": None}
+                entries.append(current)
+            if current is None:
+                continue
+
+            if is_institution and not current['institution']:
+                current['institution'] = YEAR_PATTERN.sub('', DATE_RANGE_PATTERN.sub('', line)).strip(' -–—|,()')
+            if level and not current['degree']:
+                current['degree'] = YEAR_PATTERN.sub('', DATE_RANGE_PATTERN.sub('', BULLET_PATTERN.sub('', line))).strip(' -–—|,()')
+                current['education_level'] = level
+                major = re.search(r'\b(?:in|of|major[:\s])\s+([A-Za-z &]+)', line, re.IGNORECASE)
+                if major:
+                    current['major'] = major.group(1).strip()
+
+            years = YEAR_PATTERN.findall(line)
+            if years:
+                current['graduation_year'] = int(max(years))
+            gpa = GPA_PATTERN.search(line)
+            if gpa:
+                current['gpa'] = float(gpa.group(1).replace(',', '.'))
+
+        return entries
+
+    def _match_dictionary_skills(self, text: str) -> List[Tuple[str, str]]:
+        return [(skill, category) for skill, category, pattern in self._skill_patterns if pattern.search(text)]
+
+    def _extract_skills(self, lines: List[str]) -> List[Dict[str, Any]]:
+        skills: Dict[str, Dict[str, Any]] = {}
+
+        # Items listed in the skills section keep the candidate's own spelling
+        for line in lines:
+            line = BULLET_PATTERN.sub('', line)
+            if ':' in line:
+                line = line.split(':', 1)[1]
+            for item in re.split(r'[,;/•|]', line):
+                item = item.strip(' .')
+                if item and len(item) <= 40 and item.lower() not in skills:
+                    skills[item.lower()] = {"skill_name": item, "category": self._skill_categories.get(item.lower(), "Technical"),
+                                            "proficiency_level": None, "years_experience": 0}
+
+        # Dictionary terms are only trusted inside the section too: in prose, words like
+        # "excel", "spring" or "presentation" are rarely skill claims
+        for skill, category in self._match_dictionary_skills('\n'.join(lines)):
+            if skill not in skills:
+                skills[skill] = {"skill_name": skill, "category": category,
+                                 "proficiency_level": None, "years_experience": 0}
+
+        return list(skills.values())
+
+    def _extract_projects(self, lines: List[str]) -> List[Dict[str, Any]]:
+        projects = []
+        current = None
+
+        for line in lines:
+            if BULLET_PATTERN.match(line) and current is not None:
+                current['description_lines'].append(BULLET_PATTERN.sub('', line))
+                continue
+            if current is not None and not current['description_lines'] and len(line.split()) > 8:
+                current['description_lines'].append(line)
+                continue
+            date_range = self.parse_date_range(line)
+            current = {
+                'project_name': DATE_RANGE_PATTERN.sub('', line).strip(' -–—|,()'),
+                'description_lines': [],
+                'start_date': date_range[0] if date_range else None,
+                'end_date': date_range[1] if date_range else None
+            }
+            projects.append(current)
+
+        results = []
+        for project in projects:
+            body = ' '.join(project['description_lines'])
+            github = GITHUB_PATTERN.search(body)
+            results.append({
+                "project_name": project['project_name'],
+                "description": body or None,
+                "technologies": [skill for skill, _ in self._match_dictionary_skills(f"{project['project_name']} {body}")],
+                "project_url": None,
+                "github_url": github.group(0) if github else None,
+                "start_date": project['start_date'],
+                "end_date": project['end_date']
+            })
+        return results
+
+    def _extract_certifications(self, lines: List[str]) -> List[Dict[str, Any]]:
+        certifications = []
+        for line in lines:
+            line = BULLET_PATTERN.sub('', line)
+            years = YEAR_PATTERN.findall(line)
+            name = YEAR_PATTERN.sub('', line).strip(' -–—|,()')
+            if not name:
+                continue
+            certifications.append({
+                "certification_name": name,
+                "issuing_organization": None,
+                "issue_date": years[0] if years else None,
+                "expiry_date": years[1] if len(years) > 1 else None
+            })
+        return certifications
+
+    def _extract_languages(self, lines: List[str]) -> List[Dict[str, Any]]:
+        languages = []
+        for line in lines:
+            for item in re.split(r'[,;•|]', BULLET_PATTERN.sub('', line)):
+                if not item.strip():
+                    continue
+                parts = re.split(r'\s*[:\-–(]\s*', item.strip(' )'), maxsplit=1)
+                languages.append({
+                    "language": parts[0],
+                    "proficiency": parts[1] if len(parts) > 1 else None
+                })
+        return languages
+
+rule_extractor = RuleBasedExtractor()
@@ -0,0 +1,162 @@
+import os
+import time
+import sqlite3
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Iterable
+
+class S3DiskCache:
+    def __init__(self, directory: str = "cache/s3", max_bytes: int = 2 * 1024 * 1024 * 1024, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.directory, "index.db"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS s3_cache (
+                    s3_key TEXT PRIMARY KEY,
+                    etag TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_s3_last_access ON s3_cache (last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def _path(self, s3_key: str) -> str:
+        digest = hashlib.sha256(s3_key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def lookup_etag(self, s3_key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT etag FROM s3_cache WHERE s3_key = ?", (s3_key,)
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            self.logger.warning(f"S3 cache lookup failed: {str(e)}")
+            return None
+
+    def get_path(self, s3_key: str) -> Optional[str]:
+        """Return the cached file's path after S3 confirmed the ETag is still current.
+
+        Callers stream from the path (e.g. FileResponse) rather than loading the body into memory.
+        """
+        path = self._path(s3_key)
+        if not os.path.exists(path):
+            self.invalidate(s3_key)
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("UPDATE s3_cache SET last_access = ? WHERE s3_key = ?", (time.time(), s3_key))
+                conn.commit()
+                self.hits += 1
+            return path
+        except Exception as e:
+            self.logger.warning(f"S3 cache read failed for {s3_key}: {str(e)}")
+            return None
+
+    def store(self, s3_key: str, etag: str, chunks: Iterable[bytes]) -> Optional[str]:
+        """Stream an S3 body to disk and return the cached file's path, or None if it could not be cached."""
+        path = self._path(s3_key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            size = 0
+            with open(temp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(temp_path, path)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO s3_cache (s3_key, etag, size, last_access) VALUES (?, ?, ?, ?)",
+                    (s3_key, etag, size, time.time())
+                )
+                self.misses += 1
+                self._evict(conn, keep=s3_key)
+                conn.commit()
+            return path
+        except Exception as e:
+            self.logger.warning(f"S3 cache write failed for {s3_key}: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+    def invalidate(self, s3_key: str):
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("DELETE FROM s3_cache WHERE s3_key = ?", (s3_key,))
+                conn.commit()
+            path = self._path(s3_key)
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            self.logger.warning(f"S3 cache invalidation failed for {s3_key}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, keep: str):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM s3_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT s3_key, size FROM s3_cache WHERE s3_key != ? ORDER BY last_access ASC", (keep,)
+        )
+        evicted = []
+        for s3_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append(s3_key)
+            total -= size
+        for s3_key in evicted:
+            conn.execute("DELETE FROM s3_cache WHERE s3_key = ?", (s3_key,))
+            path = self._path(s3_key)
+            if os.path.exists(path):
+                os.remove(path)
+        self.evictions += len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            try:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM s3_cache"
+                ).fetchone() if self.enabled else (0, 0)
+            except Exception:
+                entries, size = 0, 0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size
+        }
+
+S3_CACHE_CONFIG = {
+    'directory': os.getenv('S3_CACHE_DIR', 'cache/s3'),
+    'max_bytes': int(os.getenv('S3_CACHE_MAX_MB', 2048)) * 1024 * 1024,
+    'enabled': os.getenv('S3_CACHE_ENABLED', 'true').lower() == 'true'
+}
+
+s3_disk_cache = S3DiskCache(**S3_CACHE_CONFIG)
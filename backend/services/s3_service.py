@@ -1,47 +1,81 @@
 import boto3
 import os
+import io
+import asyncio
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, Dict, Any
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterator
 import uuid
 import time
 from pathlib import Path
 import mimetypes
 from dotenv import load_dotenv
+from backend.services.s3_disk_cache import S3DiskCache, s3_disk_cache
 
 load_dotenv()
 
 class S3Service:
-    def __init__(self):
+    def __init__(self, max_pool_connections: int = 32, multipart_threshold_mb: int = 8,
+                 multipart_chunksize_mb: int = 8, endpoint_url: Optional[str] = None,
+                 cache: Optional[S3DiskCache] = None):
+        # One client shared by every thread; boto3 clients are thread-safe and pool connections internally
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID'),
             aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_REGION', 'ap-southeast-1')
+            region_name=os.getenv('AWS_REGION', 'ap-southeast-1'),
+            endpoint_url=endpoint_url or None,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={'max_attempts': 5, 'mode': 'adaptive'}
+            )
         )
         self.bucket_name = os.getenv('S3_BUCKET_NAME', 'bucketchuaresume')
         self.cloudfront_domain = os.getenv('CLOUDFRONT_DOMAIN', '')
+        self.multipart_threshold = multipart_threshold_mb * 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=multipart_chunksize_mb * 1024 * 1024,
+            max_concurrency=4
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_pool_connections, thread_name_prefix='s3')
+        self.cache = cache
+
+    def make_key(self, filename: str) -> str:
+        return f"resumes/{uuid.uuid4()}{Path(filename).suffix}"
 
-    def upload_file(self, file_content: bytes, filename: str, content_type: str = None) -> Dict[str, Any]:
+    def upload_file(self, file_content: bytes, filename: str, content_type: str = None,
+                    s3_key: str = None) -> Dict[str, Any]:
         try:
-            file_extension = Path(filename).suffix
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            s3_key = f"resumes/{unique_filename}"
+            s3_key = s3_key or self.make_key(filename)
             
             if not content_type:
                 content_type, _ = mimetypes.guess_type(filename)
                 if not content_type:
                     content_type = 'application/octet-stream'
             
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=content_type,
-                Metadata={
-                    'original_filename': filename,
-                    'upload_timestamp': str(int(time.time()))
-                }
-            )
+            metadata = {
+                'original_filename': filename,
+                'upload_timestamp': str(int(time.time()))
+            }
+            if len(file_content) >= self.multipart_threshold:
+                self.s3_client.upload_fileobj(
+                    io.BytesIO(file_content),
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs={'ContentType': content_type, 'Metadata': metadata},
+                    Config=self.transfer_config
+                )
+            else:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Body=file_content,
+                    ContentType=content_type,
+                    Metadata=metadata
+                )
             
             s3_url = f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
             cdn_url = f"https://{self.cloudfront_domain}/{s3_key}" if self.cloudfront_domain else s3_url
@@ -60,21 +94,94 @@ class S3Service:
                 'success': False,
                 'error': str(e)
             }
+    
+    async def upload_file_async(self, file_content: bytes, filename: str, content_type: str = None,
+                                s3_key: str = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, lambda: self.upload_file(file_content, filename, content_type, s3_key)
+        )
+    
+    def cached_path(self, s3_key: str) -> Optional[str]:
+        """Path of a current on-disk copy of the object, fetching it into the cache on a miss.
         
-    def download_file(self, s3_key: str) -> Optional[bytes]:
+        None when the cache is disabled, the write failed or the object does not exist.
+        """
+        if not (self.cache and self.cache.enabled):
+            return None
+        etag = self.cache.lookup_etag(s3_key)
+        try:
+            if etag:
+                try:
+                    # A conditional GET validates the cached copy in the same round-trip as a miss would take
+                    response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key, IfNoneMatch=etag)
+                except ClientError as e:
+                    if e.response.get('Error', {}).get('Code') not in ('304', 'NotModified'):
+                        raise
+                    path = self.cache.get_path(s3_key)
+                    if path is not None:
+                        return path
+                    response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            else:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            # Written to disk chunk by chunk, so the body is never held in memory
+            return self.cache.store(s3_key, response['ETag'], response['Body'].iter_chunks())
+        except ClientError:
+            return None
+    
+    def stream_file(self, s3_key: str) -> Optional[Iterator[bytes]]:
+        """The object's body as chunks straight from S3, bypassing the cache."""
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            return response['Body'].read()
+            return self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)['Body'].iter_chunks()
         except ClientError:
             return None
     
+    def download_file(self, s3_key: str) -> Optional[bytes]:
+        path = self.cached_path(s3_key)
+        if path is not None:
+            try:
+                with open(path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                # Evicted between the lookup and the read
+                pass
+        chunks = self.stream_file(s3_key)
+        return b''.join(chunks) if chunks is not None else None
+    
     def delete_file(self, s3_key: str) -> bool:
         try:
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            if self.cache:
+                self.cache.invalidate(s3_key)
             return True
         except ClientError:
             return False
     
+    def delete_files(self, s3_keys: List[str]) -> Dict[str, Any]:
+        deleted = 0
+        errors = []
+        # delete_objects accepts at most 1000 keys per request
+        for start in range(0, len(s3_keys), 1000):
+            chunk = s3_keys[start:start + 1000]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+                )
+            except ClientError as e:
+                errors.extend({'s3_key': key, 'error': str(e)} for key in chunk)
+                continue
+            failed = response.get('Errors', [])
+            errors.extend({'s3_key': error['Key'], 'error': error.get('Message')} for error in failed)
+            deleted += len(chunk) - len(failed)
+            if self.cache:
+                for key in chunk:
+                    self.cache.invalidate(key)
+        return {
+            'deleted': deleted,
+            'errors': errors
+        }
+    
     def generate_presigned_url(self, s3_key: str, expiration: int = 3600) -> Optional[str]:
         try:
             url = self.s3_client.generate_presigned_url(
@@ -86,4 +193,11 @@ class S3Service:
         except ClientError:
             return None
         
-s3_service = S3Service()
\ No newline at end of file
+S3_CONFIG = {
+    'max_pool_connections': int(os.getenv('S3_MAX_POOL_CONNECTIONS', 32)),
+    'multipart_threshold_mb': int(os.getenv('S3_MULTIPART_THRESHOLD_MB', 8)),
+    'multipart_chunksize_mb': int(os.getenv('S3_MULTIPART_CHUNKSIZE_MB', 8)),
+    'endpoint_url': os.getenv('S3_ENDPOINT_URL')
+}
+
+s3_service = S3Service(**S3_CONFIG, cache=s3_disk_cache)
\ No newline at end of file
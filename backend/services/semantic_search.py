@@ -0,0 +1,101 @@
+import os
+import re
+import hashlib
+import logging
+from typing import List, Tuple, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from backend.services.vector_index import VectorIndex
+from backend.services.ollama_service import ollama_service
+from backend.models.database import ExtractedText
+from dotenv import load_dotenv
+load_dotenv()
+
+class HashingEmbedder:
+    """Offline stand-in for a real embedding model: signed feature hashing of words and word pairs."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = re.findall(r"[a-z0-9+#.]+", text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        # Sublinear term frequency so a repeated word cannot dominate the vector
+        return np.sign(vector) * np.log1p(np.abs(vector))
+
+class OllamaEmbedder:
+    def __init__(self, model: str = "nomic-embed-text", dim: int = 768, max_chars: int = 8000):
+        self.model = model
+        self.dim = dim
+        self.max_chars = max_chars
+
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        embedding = ollama_service.embed(text[:self.max_chars], self.model)
+        if embedding is None or len(embedding) != self.dim:
+            return None
+        return np.asarray(embedding, dtype=np.float32)
+
+class SemanticSearchService:
+    def __init__(self, embedder, index_dir: str = "cache/vectors", nprobe: int = 8, sync_batch_size: int = 200):
+        self.embedder = embedder
+        self.index = VectorIndex(index_dir, embedder.dim, embedder.model, nprobe=nprobe)
+        self.sync_batch_size = sync_batch_size
+        self.logger = logging.getLogger(__name__)
+
+    def sync(self, db: Session, max_rows: Optional[int] = None) -> int:
+        """Embed extracted texts added since the last sync; rows are keyed by candidate, newest text wins."""
+        added = 0
+        watermark = self.index.watermark()
+        while max_rows is None or added < max_rows:
+            rows = db.query(ExtractedText.id, ExtractedText.candidate_id, ExtractedText.processed_text).filter(
+                ExtractedText.id > watermark
+            ).order_by(ExtractedText.id).limit(self.sync_batch_size).all()
+            if not rows:
+                break
+
+            keys, vectors = [], []
+            for row in rows:
+                vector = self.embedder.embed(row.processed_text or "")
+                if vector is None:
+                    self.logger.warning(f"Embedding failed for candidate {row.candidate_id}, will retry on next sync")
+                    break
+                keys.append(row.candidate_id)
+                vectors.append(vector)
+            if keys:
+                # The watermark only advances past rows that were actually embedded
+                watermark = rows[len(keys) - 1].id
+                self.index.add(keys, np.vstack(vectors), watermark=watermark)
+                added += len(keys)
+            if len(keys) < len(rows):
+                break
+        return added
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[int, float]]:
+        # Indexing happens in the Celery worker; a search only embeds the query
+        vector = self.embedder.embed(query)
+        if vector is None:
+            return []
+        return self.index.search(vector, k)
+
+    def remove(self, candidate_ids: List[int]):
+        self.index.remove(candidate_ids)
+
+def _build_embedder():
+    if os.getenv('EMBEDDING_BACKEND', 'hashing').lower() == 'ollama':
+        return OllamaEmbedder(
+            model=os.getenv('OLLAMA_EMBEDDING_MODEL', 'nomic-embed-text'),
+            dim=int(os.getenv('EMBEDDING_DIM', 768))
+        )
+    return HashingEmbedder(dim=int(os.getenv('EMBEDDING_DIM', 256)))
+
+SEMANTIC_SEARCH_CONFIG = {
+    'index_dir': os.getenv('VECTOR_INDEX_DIR', 'cache/vectors'),
+    'nprobe': int(os.getenv('VECTOR_INDEX_NPROBE', 8)),
+    'sync_batch_size': int(os.getenv('VECTOR_SYNC_BATCH_SIZE', 200))
+}
+
+semantic_search = SemanticSearchService(_build_embedder(), **SEMANTIC_SEARCH_CONFIG)
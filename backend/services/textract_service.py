@@ -0,0 +1,156 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Tuple, Optional
+import boto3
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+THROTTLING_ERRORS = {
+    'ThrottlingException',
+    'ProvisionedThroughputExceededException',
+    'LimitExceededException'
+}
+
+class TextractService:
+    def __init__(self, bucket_name: str, endpoint_url: Optional[str] = None, poll_interval: float = 1.0,
+                 max_poll_interval: float = 15.0, backoff: float = 1.5, job_timeout: float = 300.0,
+                 max_in_flight: int = 20, max_submit_attempts: int = 5, max_submit_wait: float = 60.0):
+        self.client = boto3.client(
+            'textract',
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            region_name=os.getenv('AWS_REGION', 'ap-southeast-1'),
+            # Points at a local stand-in such as moto_server for offline runs
+            endpoint_url=endpoint_url or None
+        )
+        self.bucket_name = bucket_name
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff = backoff
+        self.job_timeout = job_timeout
+        self.max_in_flight = max(1, max_in_flight)
+        # Past either bound start_job gives up and the caller falls back to local OCR
+        self.max_submit_attempts = max(1, max_submit_attempts)
+        self.max_submit_wait = max_submit_wait
+        self.logger = logging.getLogger(__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def start_job(self, s3_key: str) -> str:
+        delay = self.poll_interval
+        waited = 0.0
+        attempt = 1
+        while True:
+            try:
+                response = self.client.start_document_text_detection(
+                    DocumentLocation={'S3Object': {'Bucket': self.bucket_name, 'Name': s3_key}}
+                )
+                return response['JobId']
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') not in THROTTLING_ERRORS:
+                    raise
+                if attempt >= self.max_submit_attempts or waited + delay > self.max_submit_wait:
+                    self.logger.warning(f"Textract still throttled after {attempt} attempt(s) for {s3_key}, giving up")
+                    raise
+                self.logger.warning(f"Textract throttled submitting {s3_key}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                waited += delay
+                attempt += 1
+                delay = min(delay * self.backoff, self.max_poll_interval)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        # None while the job is still running
+        response = self.client.get_document_text_detection(JobId=job_id)
+        status = response['JobStatus']
+        if status == 'IN_PROGRESS':
+            return None
+        if status != 'SUCCEEDED':
+            return {
+                'success': False,
+                'error': response.get('StatusMessage') or f'Textract job {status}'
+            }
+        return self._collect_result(job_id, response)
+
+    def _collect_result(self, job_id: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        lines = []
+        page_count = response.get('DocumentMetadata', {}).get('Pages', 1)
+        while True:
+            lines.extend(block['Text'] for block in response.get('Blocks', []) if block['BlockType'] == 'LINE')
+            next_token = response.get('NextToken')
+            if not next_token:
+                break
+            response = self.client.get_document_text_detection(JobId=job_id, NextToken=next_token)
+
+        text = "\n".join(lines)
+        return {
+            'success': True,
+            'text': text.strip(),
+            'page_count': page_count,
+            'extraction_method': 'OCR',
+            'extraction_backend': 'textract_async',
+            'word_count': len(text.split())
+        }
+
+    def _bind_loop(self):
+        # Futures, the semaphore and the poller belong to one loop; Celery runs a fresh loop per batch
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = {}
+            self._poller = None
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return loop
+
+    async def extract(self, s3_key: str) -> Dict[str, Any]:
+        """Run one document through a shared poller so concurrent callers are polled together."""
+        loop = self._bind_loop()
+        async with self._semaphore:
+            try:
+                job_id = await asyncio.to_thread(self.start_job, s3_key)
+            except Exception as e:
+                self.logger.error(f"Textract submission failed for {s3_key}: {str(e)}")
+                return {'success': False, 'error': str(e)}
+
+            future = loop.create_future()
+            self._pending[job_id] = (future, time.time())
+            if self._poller is None or self._poller.done():
+                self._poller = loop.create_task(self._poll_pending())
+            return await future
+
+    async def _poll_pending(self):
+        interval = self.poll_interval
+        while self._pending:
+            await asyncio.sleep(interval)
+            finished = False
+            for job_id, (future, started_at) in list(self._pending.items()):
+                try:
+                    result = await asyncio.to_thread(self.get_job, job_id)
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                if result is None and time.time() - started_at > self.job_timeout:
+                    result = {'success': False, 'error': f'Textract job timed out after {self.job_timeout}s'}
+                if result is not None:
+                    del self._pending[job_id]
+                    finished = True
+                    if not future.done():
+                        future.set_result(result)
+            interval = self.poll_interval if finished else min(interval * self.backoff, self.max_poll_interval)
+
+TEXTRACT_CONFIG = {
+    'bucket_name': os.getenv('S3_BUCKET_NAME', 'bucketchuaresume'),
+    'endpoint_url': os.getenv('TEXTRACT_ENDPOINT_URL'),
+    'poll_interval': float(os.getenv('TEXTRACT_POLL_INTERVAL', 1.0)),
+    'max_poll_interval': float(os.getenv('TEXTRACT_MAX_POLL_INTERVAL', 15.0)),
+    'job_timeout': float(os.getenv('TEXTRACT_JOB_TIMEOUT', 300)),
+    'max_in_flight': int(os.getenv('TEXTRACT_MAX_IN_FLIGHT', 20)),
+    'max_submit_attempts': int(os.getenv('TEXTRACT_MAX_SUBMIT_ATTEMPTS', 5)),
+    'max_submit_wait': float(os.getenv('TEXTRACT_MAX_SUBMIT_WAIT', 60))
+}
+
+textract_service = TextractService(**TEXTRACT_CONFIG)
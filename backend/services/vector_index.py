@@ -0,0 +1,274 @@
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Optional
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    # Windows: lock the first byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+class VectorIndex:
+    """Float32 vectors in a memory-mapped matrix with an IVF (k-means inverted file) index on top.
+
+    Rows are keyed by candidate ID; re-adding a key overwrites its row. Below train_threshold rows
+    search is exact; above it only the nprobe closest lists are scanned. Several processes may share
+    the directory: writers serialize on a file lock and readers reload when meta.json changes.
+    """
+
+    def __init__(self, directory: str, dim: int, model: str, nprobe: int = 8, train_threshold: int = 2048,
+                 kmeans_iterations: int = 10):
+        self.directory = directory
+        self.dim = dim
+        self.model = model
+        self.nprobe = max(1, nprobe)
+        self.train_threshold = train_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._meta_mtime = None
+        self.meta: Dict[str, Any] = self._empty_meta()
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._assignments: Optional[np.memmap] = None
+        self._rows: Dict[int, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self._path("index.lock"), "a+") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _open_matrix(self, name: str, dtype, shape: Tuple[int, ...]) -> np.memmap:
+        path = self._path(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _save_meta(self):
+        temp_path = self._path("meta.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(temp_path, self._path("meta.json"))
+        self._meta_mtime = os.stat(self._path("meta.json")).st_mtime_ns
+
+    def _empty_meta(self) -> Dict[str, Any]:
+        return {'dim': self.dim, 'model': self.model, 'count': 0, 'capacity': 1024,
+                'watermark': 0, 'trained_count': 0, 'nlist': 0}
+
+    def refresh(self, reset: bool = False):
+        """Load or reload the on-disk state if another process has written since the last load.
+
+        A missing index, or one built for another model, reads as empty. Only writers pass reset=True,
+        under the write lock, to wipe and recreate the files; readers never touch them.
+        """
+        with self._lock:
+            meta_path = self._path("meta.json")
+            try:
+                mtime = os.stat(meta_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self._meta_mtime and (self._vectors is not None or not reset):
+                return
+
+            meta = None
+            if mtime is not None:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            if not meta or meta.get('dim') != self.dim or meta.get('model') != self.model:
+                if not reset:
+                    self.meta = self._empty_meta()
+                    self._meta_mtime = mtime
+                    self._vectors = self._keys = self._assignments = None
+                    self._rows = {}
+                    self._centroids = None
+                    self._lists = []
+                    return
+                # A different embedding model makes every stored vector meaningless
+                meta = self._empty_meta()
+                os.makedirs(self.directory, exist_ok=True)
+                for name in ("vectors.f32", "keys.i64", "assign.i32", "centroids.npy"):
+                    if os.path.exists(self._path(name)):
+                        os.remove(self._path(name))
+                self.meta = meta
+                self._save_meta()
+            self.meta = meta
+            self._meta_mtime = os.stat(meta_path).st_mtime_ns
+            self._map_files()
+
+    def _map_files(self):
+        capacity, count = self.meta['capacity'], self.meta['count']
+        self._vectors = self._open_matrix("vectors.f32", np.float32, (capacity, self.dim))
+        self._keys = self._open_matrix("keys.i64", np.int64, (capacity,))
+        self._assignments = self._open_matrix("assign.i32", np.int32, (capacity,))
+        self._rows = {int(key): row for row, key in enumerate(self._keys[:count])}
+        centroid_path = self._path("centroids.npy")
+        self._centroids = np.load(centroid_path) if self.meta['nlist'] and os.path.exists(centroid_path) else None
+        self._rebuild_lists()
+
+    def _rebuild_lists(self):
+        if self._centroids is None:
+            self._lists = []
+            return
+        assignments = np.asarray(self._assignments[:self.meta['count']])
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self.meta['capacity']:
+            return
+        capacity = max(needed, self.meta['capacity'] * 2)
+        for matrix in (self._vectors, self._keys, self._assignments):
+            matrix.flush()
+        self.meta['capacity'] = capacity
+        self._vectors = self._open_matrix("vectors.f32", np.float32, (capacity, self.dim))
+        self._keys = self._open_matrix("keys.i64", np.int64, (capacity,))
+        self._assignments = self._open_matrix("assign.i32", np.int32, (capacity,))
+
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def add(self, keys: List[int], vectors: np.ndarray, watermark: Optional[int] = None):
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with self._write_lock():
+            self.refresh(reset=True)
+            rows = []
+            for key in keys:
+                row = self._rows.get(int(key))
+                if row is None:
+                    row = self.meta['count']
+                    self._ensure_capacity(row + 1)
+                    self._rows[int(key)] = row
+                    self._keys[row] = key
+                    self.meta['count'] += 1
+                rows.append(row)
+            rows = np.array(rows, dtype=np.int64)
+            self._vectors[rows] = vectors
+
+            count = self.meta['count']
+            if count >= self.train_threshold and count >= 4 * self.meta['trained_count']:
+                self._train()
+            elif self._centroids is not None:
+                self._assignments[rows] = self._nearest_centroids(vectors)
+                self._rebuild_lists()
+
+            if watermark is not None:
+                self.meta['watermark'] = max(self.meta['watermark'], watermark)
+            for matrix in (self._vectors, self._keys, self._assignments):
+                matrix.flush()
+            self._save_meta()
+
+    def remove(self, keys: List[int]):
+        with self._write_lock():
+            self.refresh(reset=True)
+            removed = 0
+            for key in keys:
+                row = self._rows.pop(int(key), None)
+                if row is None:
+                    continue
+                # Move the last row into the hole so the matrix stays dense
+                last = self.meta['count'] - 1
+                if row != last:
+                    last_key = int(self._keys[last])
+                    self._vectors[row] = self._vectors[last]
+                    self._keys[row] = last_key
+                    self._assignments[row] = self._assignments[last]
+                    self._rows[last_key] = row
+                self.meta['count'] -= 1
+                removed += 1
+            if not removed:
+                return
+            self._rebuild_lists()
+            for matrix in (self._vectors, self._keys, self._assignments):
+                matrix.flush()
+            self._save_meta()
+
+    def _train(self):
+        count = self.meta['count']
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(self._vectors[rng.choice(count, size=min(count, nlist * 64), replace=False)])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        # Spherical k-means: vectors are unit length, so similarity is a dot product
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+
+        self._centroids = centroids.astype(np.float32)
+        for start in range(0, count, 8192):
+            stop = min(start + 8192, count)
+            self._assignments[start:stop] = self._nearest_centroids(np.asarray(self._vectors[start:stop]))
+        np.save(self._path("centroids.npy"), self._centroids)
+        self.meta['nlist'] = nlist
+        self.meta['trained_count'] = count
+        self._rebuild_lists()
+        self.logger.info(f"Trained IVF index with {nlist} lists over {count} vectors")
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def search(self, query: np.ndarray, k: int = 20) -> List[Tuple[int, float]]:
+        self.refresh()
+        with self._lock:
+            count = self.meta['count']
+            if count == 0:
+                return []
+            query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+
+            if self._centroids is None:
+                rows = np.arange(count)
+            else:
+                probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+                rows = np.concatenate([self._lists[c] for c in probes])
+            if len(rows) == 0:
+                return []
+
+            scores = np.asarray(self._vectors[rows]) @ query
+            k = min(k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(self._keys[rows[i]]), float(scores[i])) for i in top]
+
+    def watermark(self) -> int:
+        self.refresh()
+        return self.meta['watermark']
+
+    def stats(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            'vectors': self.meta['count'],
+            'dim': self.dim,
+            'model': self.model,
+            'lists': self.meta['nlist'],
+            'nprobe': self.nprobe
+        }
@@ -1,11 +1,16 @@
 from fastapi import FastAPI, Depends, UploadFile, File, HTTPException, Query
 from fastapi.responses import HTMLResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 import backend.models.database as db_models
 from backend.database.config import get_db
 from backend.services.resume_processor import resume_processor
+from backend.services.ollama_service import ollama_service
+from backend.services.file_processor import file_processor
+from backend.services.semantic_search import semantic_search
+from backend.services.fulltext_search import fulltext_search
 from backend.models.database import ProcessingBatch
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
@@ -13,9 +18,15 @@ from api.routes import candidates, dashboard, batches, jobs
 app = FastAPI()
 
 app.include_router(candidates.router, prefix="/api/candidates", tags=["candidates"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("shutdown")
+async def close_clients():
+    await ollama_service.aclose()
+    file_processor.shutdown()
+
 @app.get("/", response_class=HTMLResponse)
 async def serve_dashboard():
     with open("resume_ats_dashboard.html", "r", encoding="utf-8") as f:
@@ -29,11 +40,26 @@ async def get_candidates(
     min_score: Optional[float] = Query(None),
     skip: int = Query(0, ge=0),  
     limit: int = Query(20, ge=1, le=100),  
+    mode: str = Query("keyword", pattern="^(keyword|semantic)$"),
+    q: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
     query = db.query(db_models.Candidate)
     
-    if search:
+    parsed = None
+    if q:
+        parsed = fulltext_search.parse(q)
+        if parsed is None:
+            raise HTTPException(status_code=400, detail="Query must contain at least one search term")
+        query = fulltext_search.apply(db, query, parsed)
+    
+    ranking = None
+    if search and mode == "semantic":
+        ranking = {candidate_id: rank for rank, (candidate_id, _) in enumerate(
+            await run_in_threadpool(semantic_search.search, search, k=(skip + limit) * 4)
+        )}
+        query = query.filter(db_models.Candidate.id.in_(list(ranking)))
+    elif search:
         query = query.filter(
             (db_models.Candidate.full_name.ilike(f"%{search}%")) |
             (db_models.Candidate.email.ilike(f"%{search}%"))
@@ -45,8 +71,11 @@ async def get_candidates(
     if min_score:
         query = query.filter(db_models.Candidate.overall_score >= min_score)
         
-    total = query.count()
-    candidates = query.offset(skip).limit(limit).all()
+    if ranking is not None:
+        candidates = sorted(query.all(), key=lambda c: ranking[c.id])[skip:skip + limit]
+    else:
+        candidates = query.offset(skip).limit(limit).all()
+    highlights = fulltext_search.highlights_for(db, [c.id for c in candidates], parsed) if parsed else {}
     return [{
         "id": c.id,
         "full_name": c.full_name,
@@ -54,7 +83,8 @@ async def get_candidates(
         "overall_score": float(c.overall_score),
         "experience_level": c.experience_level.value,
         "status": c.status.value,
-        "created_at": c.created_at.isoformat()
+        "created_at": c.created_at.isoformat(),
+        "highlights": highlights.get(c.id)
     } for c in candidates]
 
 @app.get("/api/dashboard/stats")
@@ -87,8 +117,13 @@ async def upload_resumes(
         contents = await file.read() 
         file_contents.append((file.filename, contents))  
     
-    batch_id = await resume_processor.process_batch(file_contents, batch_name)
-    return {"batch_id": batch_id, "message": "Resumes uploaded and processing started"}
+    # Spooling to disk and the broker round trip both block, so keep them off the event loop
+    batch_id = await run_in_threadpool(resume_processor.create_batch, file_contents, batch_name)
+    try:
+        await run_in_threadpool(resume_processor.enqueue_batch, batch_id)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Processing queue unavailable, please retry")
+    return {"batch_id": batch_id, "message": "Resumes uploaded and queued for processing"}
 
 @app.delete("/api/candidates/{candidate_id}")
 async def delete_candidate(candidate_id: int, db: Session = Depends(get_db)):
@@ -104,14 +139,24 @@ async def get_batch_status(batch_id: str, db: Session = Depends(get_db)):
     batch = db.query(ProcessingBatch).filter(ProcessingBatch.batch_id == batch_id).first()
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
+    in_progress = db.query(db_models.ProcessingLog).filter(
+        db_models.ProcessingLog.batch_id == batch_id,
+        db_models.ProcessingLog.processing_status == db_models.ProcessingStatus.PROCESSING
+    ).all()
     return {
         "batch_id": batch.batch_id,
         "status": batch.status,
         "total_files": batch.total_files,
         "processed_files": batch.processed_files,
         "successful_files": batch.successful_files,
-        "failed_files": batch.failed_files
+        "failed_files": batch.failed_files,
+        "in_progress": [{
+            "filename": log.filename,
+            "partial_result": (log.meta_data or {}).get('partial_result')
+        } for log in in_progress]
     }
 
+# Registered last so the dashboard page's own /api/dashboard/stats above keeps precedence
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
 
 # uvicorn main:app --reload --host 0.0.0.0 --port 8000    
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+from backend.models.database import Base
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BASE_TABLES = [
+    'candidates', 'education', 'experience', 'skills', 'projects', 'certifications',
+    'processing_batches', 'processing_logs', 'extracted_text', 'job_requirements'
+]
+
+def upgrade():
+    # Databases set up before migrations existed already have these tables; only missing ones are created
+    tables = [Base.metadata.tables[name] for name in BASE_TABLES]
+    Base.metadata.create_all(op.get_bind(), tables=tables, checkfirst=True)
+
+def downgrade():
+    tables = [Base.metadata.tables[name] for name in BASE_TABLES]
+    Base.metadata.drop_all(op.get_bind(), tables=tables, checkfirst=True)
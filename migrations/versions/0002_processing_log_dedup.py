@@ -0,0 +1,30 @@
+"""Add file_hash and meta_data to processing_logs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+def upgrade():
+    # Skipped when 0001 just created the table from the current model
+    columns = _columns('processing_logs')
+    if 'file_hash' not in columns:
+        op.add_column('processing_logs', sa.Column('file_hash', sa.String(64)))
+        op.create_index('ix_processing_logs_file_hash', 'processing_logs', ['file_hash'])
+    if 'meta_data' not in columns:
+        op.add_column('processing_logs', sa.Column('meta_data', sa.JSON))
+
+def downgrade():
+    op.drop_column('processing_logs', 'meta_data')
+    op.drop_index('ix_processing_logs_file_hash', table_name='processing_logs')
+    op.drop_column('processing_logs', 'file_hash')
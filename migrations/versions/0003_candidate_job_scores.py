@@ -0,0 +1,37 @@
+"""Materialized candidate/job match scores
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'scores_computed_at' not in {column['name'] for column in inspector.get_columns('job_requirements')}:
+        op.add_column('job_requirements', sa.Column('scores_computed_at', sa.TIMESTAMP, nullable=True))
+
+    if not inspector.has_table('candidate_job_scores'):
+        op.create_table(
+            'candidate_job_scores',
+            sa.Column('id', sa.Integer, primary_key=True, index=True),
+            sa.Column('job_id', sa.Integer, sa.ForeignKey('job_requirements.id'), nullable=False),
+            sa.Column('candidate_id', sa.Integer, sa.ForeignKey('candidates.id'), nullable=False, index=True),
+            sa.Column('match_score', sa.DECIMAL(5, 2), nullable=False),
+            sa.Column('matched_required_skills', sa.JSON),
+            sa.Column('missing_required_skills', sa.JSON),
+            sa.Column('matched_preferred_skills', sa.JSON),
+            sa.Column('updated_at', sa.TIMESTAMP, server_default=sa.func.now()),
+            sa.UniqueConstraint('job_id', 'candidate_id', name='uq_job_candidate'),
+            sa.Index('idx_job_match_score', 'job_id', 'match_score')
+        )
+
+def downgrade():
+    op.drop_table('candidate_job_scores')
+    op.drop_column('job_requirements', 'scores_computed_at')
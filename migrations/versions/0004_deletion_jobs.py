@@ -0,0 +1,35 @@
+"""Bulk candidate deletion jobs
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('deletion_jobs'):
+        return
+    op.create_table(
+        'deletion_jobs',
+        sa.Column('id', sa.Integer, primary_key=True, index=True),
+        sa.Column('job_id', sa.String(36), unique=True, nullable=False, index=True),
+        sa.Column('criteria', sa.JSON),
+        sa.Column('status', sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', name='batchstatus'), index=True),
+        sa.Column('total_candidates', sa.Integer, server_default='0'),
+        sa.Column('deleted_candidates', sa.Integer, server_default='0'),
+        sa.Column('deleted_files', sa.Integer, server_default='0'),
+        sa.Column('failed_files', sa.Integer, server_default='0'),
+        sa.Column('error_message', sa.Text),
+        sa.Column('started_at', sa.TIMESTAMP),
+        sa.Column('completed_at', sa.TIMESTAMP),
+        sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.now())
+    )
+
+def downgrade():
+    op.drop_table('deletion_jobs')
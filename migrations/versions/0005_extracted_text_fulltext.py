@@ -0,0 +1,26 @@
+"""FULLTEXT index for resume keyword search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+    if 'ft_extracted_raw_text' in {index['name'] for index in sa.inspect(bind).get_indexes('extracted_text')}:
+        return
+    # Builds the index over every stored CV; on a large table expect this to take a while
+    op.create_index('ft_extracted_raw_text', 'extracted_text', ['raw_text'], mysql_prefix='FULLTEXT')
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        op.drop_index('ft_extracted_raw_text', table_name='extracted_text')
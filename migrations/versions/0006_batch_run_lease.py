@@ -0,0 +1,25 @@
+"""Track which run owns a processing batch
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Skipped when 0001 just created the table from the current model
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('processing_batches')}
+    if 'run_id' not in columns:
+        op.add_column('processing_batches', sa.Column('run_id', sa.String(36)))
+    if 'heartbeat_at' not in columns:
+        op.add_column('processing_batches', sa.Column('heartbeat_at', sa.TIMESTAMP))
+
+def downgrade():
+    op.drop_column('processing_batches', 'heartbeat_at')
+    op.drop_column('processing_batches', 'run_id')